@@ -0,0 +1,95 @@
+"""dashboard, mail queue and GHN master data tables
+
+Các bảng thêm mới sau schema gốc: rollup doanh thu / KPI cho dashboard, hàng đợi email,
+bản sao dữ liệu tỉnh/huyện/xã GHN. Database cũ đã `alembic stamp 0001` sẽ được tạo
+các bảng này ở bước upgrade, daily_revenue được nạp sẵn doanh thu các đơn đã thanh toán.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 13:44:39.512207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_revenue',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('amount', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('paid_orders', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('delta', sa.DECIMAL(precision=18, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'metric')
+    )
+    op.create_table('ghn_master_data',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('kind', 'parent_id')
+    )
+    op.create_table('outbound_emails',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('to_address', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('html_body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('sent_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('outbound_emails', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_outbound_emails_status'), ['status'], unique=False)
+
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.DECIMAL(precision=18, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Nạp doanh thu lịch sử ngay khi tạo bảng (trước đây chỉ nạp nếu bảng còn trống lúc mở
+    # dashboard, nên bị bỏ qua nếu đã có thanh toán mới ghi vào rollup trước đó)
+    orders = sa.table('orders',
+        sa.column('id', sa.Integer), sa.column('created_at', sa.TIMESTAMP),
+        sa.column('total_amount', sa.DECIMAL(15, 2)), sa.column('payment_status', sa.String),
+    )
+    day = sa.func.date(orders.c.created_at)
+    op.execute(
+        sa.table('daily_revenue', sa.column('day'), sa.column('amount'), sa.column('paid_orders'))
+        .insert()
+        .from_select(
+            ['day', 'amount', 'paid_orders'],
+            sa.select(day, sa.func.sum(orders.c.total_amount), sa.func.count(orders.c.id))
+            .where(orders.c.payment_status == 'PAID', orders.c.created_at.is_not(None))
+            .group_by(day),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stat_counters')
+    with op.batch_alter_table('outbound_emails', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_outbound_emails_status'))
+
+    op.drop_table('outbound_emails')
+    op.drop_table('ghn_master_data')
+    op.drop_table('daily_stats')
+    op.drop_table('daily_revenue')
@@ -0,0 +1,71 @@
+"""hot query indexes
+
+Index cho các cột mà listing sản phẩm, lịch sử đơn, dashboard, thông báo,
+xác thực email/đặt lại mật khẩu lọc và sắp xếp theo.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 13:44:49.951998
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('addresses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_addresses_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_favorites_product_id'), ['product_id'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_payment_status_created_at', ['payment_status', 'created_at'], unique=False)
+        batch_op.create_index('ix_orders_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_category_id'), ['category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_is_active'), ['is_active'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_price'), ['price'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_sold_count'), ['sold_count'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_password_reset_token'), ['password_reset_token'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_verification_code'), ['verification_code'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_verification_code'))
+        batch_op.drop_index(batch_op.f('ix_users_password_reset_token'))
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_sold_count'))
+        batch_op.drop_index(batch_op.f('ix_products_price'))
+        batch_op.drop_index(batch_op.f('ix_products_is_active'))
+        batch_op.drop_index(batch_op.f('ix_products_category_id'))
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_user_id_created_at')
+        batch_op.drop_index('ix_orders_payment_status_created_at')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_id_created_at')
+
+    with op.batch_alter_table('favorites', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_favorites_product_id'))
+
+    with op.batch_alter_table('addresses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_addresses_user_id'))
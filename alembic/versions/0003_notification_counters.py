@@ -0,0 +1,38 @@
+"""notification counters
+
+Bộ đếm thông báo chưa đọc theo user, khởi tạo từ dữ liệu notifications hiện có.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:05:12.418233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread) "
+        "SELECT user_id, COUNT(*) FROM notifications "
+        "WHERE is_read = false GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('notification_counters')
@@ -0,0 +1,48 @@
+"""cart unique line
+
+Gộp các dòng giỏ hàng trùng (user_id, product_id) rồi thêm unique constraint cho upsert.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:51:38.663557
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _merge_duplicate_lines() -> None:
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text(
+        "SELECT user_id, product_id, MIN(id), SUM(quantity) FROM cart_items "
+        "GROUP BY user_id, product_id HAVING COUNT(*) > 1"
+    )).all()
+    for user_id, product_id, keep_id, quantity in duplicates:
+        conn.execute(
+            sa.text("UPDATE cart_items SET quantity = :quantity WHERE id = :id"),
+            {"quantity": quantity, "id": keep_id},
+        )
+        conn.execute(
+            sa.text("DELETE FROM cart_items WHERE user_id = :user_id AND product_id = :product_id AND id <> :id"),
+            {"user_id": user_id, "product_id": product_id, "id": keep_id},
+        )
+
+
+def upgrade() -> None:
+    _merge_duplicate_lines()
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cart_items_user_product', ['user_id', 'product_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('cart_items', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cart_items_user_product', type_='unique')
@@ -0,0 +1,36 @@
+"""related products empty marker
+
+product_related.related_id cho phép NULL: sản phẩm không có sản phẩm liên quan nào được lưu
+1 dòng related_id NULL để TTL áp dụng như các sản phẩm khác thay vì tính lại ở mỗi lượt xem.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:12:07.481903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('product_related', schema=None) as batch_op:
+        batch_op.alter_column('related_id',
+               existing_type=sa.Integer(),
+               nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM product_related WHERE related_id IS NULL")
+    with op.batch_alter_table('product_related', schema=None) as batch_op:
+        batch_op.alter_column('related_id',
+               existing_type=sa.Integer(),
+               nullable=False)
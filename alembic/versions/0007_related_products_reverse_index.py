@@ -0,0 +1,31 @@
+"""related products reverse index
+
+Index product_related.related_id: tìm các sản phẩm đang xếp 1 sản phẩm trong danh sách
+liên quan của mình để tính lại cùng lúc (sau đơn mới, khi admin sửa sản phẩm).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:48:52.306117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('product_related', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_related_related_id'), ['related_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('product_related', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_related_related_id'))
@@ -1,5 +1,4 @@
-import requests
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db
@@ -7,33 +6,33 @@ from app.models.address import Address
 from app.api.deps import get_current_user
 from app.schemas.address import AddressCreate, AddressUpdate, AddressResponse
 from app.core.config import settings
+from app.core.responses import RawJSONResponse
+from app.core.ghn_master_data import master_data, Entry, PROVINCE, DISTRICT, WARD
 
 router = APIRouter()
 
 
+def _master_data_response(request: Request, entry: Entry) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={settings.GHN_MASTER_DATA_MAX_AGE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == entry.etag:
+        return Response(status_code=304, headers=headers)
+    return RawJSONResponse(entry.body, headers=headers)
+
+
 @router.get("/provinces")
-def get_ghn_provinces():
-    url = "https://dev-online-gateway.ghn.vn/shiip/public-api/master-data/province"
-    headers = {"Token": settings.GHN_TOKEN}
-    try:
-        res = requests.get(url, headers=headers)
-        return res.json()["data"]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi kết nối GHN: {str(e)}")
+def get_ghn_provinces(request: Request, db: Session = Depends(get_db)):
+    return _master_data_response(request, master_data.get(db, PROVINCE))
 
 @router.get("/districts")
-def get_ghn_districts(province_id: int):
-    url = "https://dev-online-gateway.ghn.vn/shiip/public-api/master-data/district"
-    headers = {"Token": settings.GHN_TOKEN}
-    res = requests.get(url, headers=headers, params={"province_id": province_id})
-    return res.json()["data"]
+def get_ghn_districts(province_id: int, request: Request, db: Session = Depends(get_db)):
+    return _master_data_response(request, master_data.get(db, DISTRICT, province_id))
 
 @router.get("/wards")
-def get_ghn_wards(district_id: int):
-    url = "https://dev-online-gateway.ghn.vn/shiip/public-api/master-data/ward"
-    headers = {"Token": settings.GHN_TOKEN}
-    res = requests.get(url, headers=headers, params={"district_id": district_id})
-    return res.json()["data"]
+def get_ghn_wards(district_id: int, request: Request, db: Session = Depends(get_db)):
+    return _master_data_response(request, master_data.get(db, WARD, district_id))
 
 
 
@@ -9,7 +9,10 @@ from app.models.category import Category
 from app.models.profile import Profile
 from app.api.deps import get_current_active_admin
 from app.schemas.dashboardResponse import DashboardResponse
-from datetime import datetime, timedelta
+from app.core.revenue import revenue_chart as get_revenue_chart
+from app.core.ghn_master_data import master_data
+from app.db.pool_metrics import pool_snapshot
+from app.core.stats import snapshot as stats_snapshot, format_trend, ORDERS, REVENUE, PRODUCTS, USERS
 
 router = APIRouter()
 
@@ -20,31 +23,20 @@ def get_dashboard_data(
     current_admin = Depends(get_current_active_admin)
 ):
     try:
-        total_rev = db.query(func.sum(Order.total_amount)).filter(Order.payment_status == "PAID").scalar() or 0
-        order_count = db.query(Order).count()
-        product_count = db.query(Product).count()
-        user_count = db.query(User).count()
+        kpi = stats_snapshot(db, days)
+        total_rev, rev_delta = kpi[REVENUE]
+        order_count, order_delta = kpi[ORDERS]
+        product_count, product_delta = kpi[PRODUCTS]
+        user_count, user_delta = kpi[USERS]
 
         stats = [
-            {"title": "Tổng doanh thu", "value": f"{float(total_rev):,.0f}đ", "icon": "payments", "trend": "+12.5%"},
-            {"title": "Đơn hàng", "value": str(order_count), "icon": "shopping_cart", "trend": "+3.2%"},
-            {"title": "Sản phẩm", "value": str(product_count), "icon": "inventory_2", "trend": "0%"},
-            {"title": "Khách hàng", "value": str(user_count), "icon": "group", "trend": "+5.4%"},
+            {"title": "Tổng doanh thu", "value": f"{float(total_rev):,.0f}đ", "icon": "payments", "trend": format_trend(total_rev, rev_delta)},
+            {"title": "Đơn hàng", "value": str(int(order_count)), "icon": "shopping_cart", "trend": format_trend(order_count, order_delta)},
+            {"title": "Sản phẩm", "value": str(int(product_count)), "icon": "inventory_2", "trend": format_trend(product_count, product_delta)},
+            {"title": "Khách hàng", "value": str(int(user_count)), "icon": "group", "trend": format_trend(user_count, user_delta)},
         ]
 
-        revenue_chart = []
-        for i in range(days - 1, -1, -1):
-            target_date = (datetime.now() - timedelta(days=i)).date()
-            
-            daily_rev = db.query(func.sum(Order.total_amount)).filter(
-                func.date(Order.created_at) == target_date,
-                Order.payment_status == "PAID"
-            ).scalar() or 0
-            
-            revenue_chart.append({
-                "date": target_date.strftime("%d/%m"), 
-                "amount": float(daily_rev)
-            })
+        revenue_chart = get_revenue_chart(db, days)
 
         top_cats = db.query(
             Category.name, func.count(Product.id).label("value")
@@ -78,4 +70,18 @@ def get_dashboard_data(
 
     except Exception as e:
         print(f"Admin Dashboard Error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Lỗi hệ thống: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Lỗi hệ thống: {str(e)}")
+
+
+@router.post("/ghn-master-data/refresh")
+def refresh_ghn_master_data(
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_active_admin)
+):
+    refreshed = master_data.refresh(db)
+    return {"message": "Đã làm mới dữ liệu địa giới GHN", "lists": refreshed}
+
+
+@router.get("/metrics/db-pool")
+def get_db_pool_metrics(current_admin = Depends(get_current_active_admin)):
+    return pool_snapshot()
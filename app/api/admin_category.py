@@ -2,20 +2,29 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.category import Category
 from app.models.product import Product 
 from app.schemas.admin_category import CategoryCreate, CategoryUpdate
 from app.api.deps import get_current_active_admin
+from app.core.search import product_search_index
+from app.core.home_cache import home_cache
+from app.core.http_cache import bump_catalog_version
+from app.core.cache import get_cache
+from app.api.product import PRODUCT_COUNT_TAG
 from typing import List
+import math
 
 router = APIRouter()
 
 @router.get("/")
 def get_categories(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin = Depends(get_current_active_admin),
     search: str = Query(None),
-    status: str = Query(None)
+    status: str = Query(None),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100)
 ):
     query = db.query(Category)
 
@@ -27,12 +36,17 @@ def get_categories(
     elif status == "Đang ẩn":
         query = query.filter(Category.is_active == False)
 
-    categories = query.all()
+    total_count = query.count()
+
+    # Đếm sản phẩm bằng LEFT JOIN + GROUP BY trong cùng 1 query thay vì 1 query/danh mục
+    categories = query.outerjoin(Product, Product.category_id == Category.id)\
+        .add_columns(func.count(Product.id).label("product_count"))\
+        .group_by(Category.id)\
+        .order_by(Category.id)\
+        .offset((page - 1) * size).limit(size).all()
 
     results = []
-    for cat in categories:
-        p_count = db.query(func.count(Product.id)).filter(Product.category_id == cat.id).scalar()
-        
+    for cat, p_count in categories:
         results.append({
             "id": cat.id,
             "name": cat.name,
@@ -43,7 +57,13 @@ def get_categories(
             "productCount": p_count or 0
         })
 
-    return results
+    return {
+        "items": results,
+        "total": total_count,
+        "page": page,
+        "size": size,
+        "pages": math.ceil(total_count / size)
+    }
 
 @router.post("/")
 def create_category(
@@ -58,6 +78,9 @@ def create_category(
     db.add(new_cat)
     db.commit()
     db.refresh(new_cat)
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
     return {"message": "Tạo thành công", "id": new_cat.id}
 
 @router.patch("/{cat_id}")
@@ -76,6 +99,11 @@ def update_category(
         setattr(db_cat, key, value)
     
     db.commit()
+    if "name" in update_data:
+        product_search_index.invalidate()
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
     return {"message": "Cập nhật thành công"}
 
 @router.delete("/{cat_id}")
@@ -96,4 +124,7 @@ def delete_category(
 
     # db.delete(db_cat)
     db.commit()
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
     return {"message": "Đã ẩn danh mục"}
\ No newline at end of file
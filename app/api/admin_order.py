@@ -2,13 +2,15 @@ from fastapi import APIRouter, Depends, Query, HTTPException, Body
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, func, cast, String 
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.order import Order, ShippingStatus, PaymentStatus
 from app.models.user import User
 from app.models.profile import Profile
 from app.api.deps import get_current_active_admin
 from app.schemas.admin_order import OrderPaginationResponse
-from app.models.notification import Notification
+from app.core.notifications import notify
 from app.core.shipping import create_ghn_shipping_order
+from app.core.revenue import remove_order, set_payment_status
 from app.models.address import Address
 from typing import Optional
 import math
@@ -17,7 +19,7 @@ router = APIRouter()
 
 @router.get("/orders", response_model=OrderPaginationResponse)
 def get_admin_orders(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin = Depends(get_current_active_admin),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
@@ -99,7 +101,7 @@ def update_order_status(
     if new_shipping_status:
         order.shipping_status = new_shipping_status
     if new_payment_status:
-        order.payment_status = new_payment_status
+        set_payment_status(db, order, new_payment_status)
         
     db.commit()
 
@@ -117,14 +119,13 @@ def update_order_status(
         if order.tracking_code:
             notif_content += f" Mã vận đơn: {order.tracking_code}"
 
-        new_notif = Notification(
+        notify(
+            db,
             user_id=order.user_id,
             title=f"Cập nhật đơn hàng #{order.id}",
             content=notif_content,
-            type="order",
-            is_read=False
+            type="order"
         )
-        db.add(new_notif)
         db.commit()
 
     return {
@@ -149,12 +150,16 @@ def delete_order(
             detail="Chỉ có thể xóa đơn hàng đã hoàn thành hoặc đã hủy"
         )
     try:
-    
-        db.delete(order)
+        if not remove_order(db, order):
+            # Request khác vừa xóa/đổi trạng thái đơn này
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Không thấy đơn hàng")
         db.commit()
 
         return {"message": "Đã xóa đơn hàng thành công"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         print(f"Delete Order Error: {str(e)}")
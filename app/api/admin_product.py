@@ -1,11 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.product import Product
 from app.models.category import Category
 from app.models.product_image import ProductImage 
 from app.schemas.admin_product import ProductCreate, ProductUpdate
 from app.api.deps import get_current_active_admin
+from app.core.search import product_search_index
+from app.core.home_cache import home_cache
+from app.core.http_cache import bump_catalog_version
+from app.core.cache import get_cache
+from app.api.product import PRODUCT_COUNT_TAG
+from app.core import stats
+from app.core.related import schedule_refresh as schedule_related_refresh
 from typing import Optional, List
 from sqlalchemy import desc
 
@@ -13,7 +21,7 @@ router = APIRouter()
 
 @router.get("")
 def get_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin = Depends(get_current_active_admin),
     search: Optional[str] = Query(None),       
     category_id: Optional[int] = Query(None)
@@ -74,7 +82,13 @@ def create_product(product_in: ProductCreate, db: Session = Depends(get_db)):
     for sz in (product_in.sizes or []):
         db.add(ProductVariant(product_id=new_prod.id, variant_type="size", variant_value=sz))
 
+    stats.bump(db, stats.PRODUCTS)
     db.commit()
+    product_search_index.refresh_product(db, new_prod.id)
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
+    schedule_related_refresh([new_prod.id])
     return {"message": "Tạo thành công", "id": new_prod.id}
 
 @router.patch("/{prod_id}")
@@ -99,6 +113,11 @@ def update_product(prod_id: int, product_in: ProductUpdate, db: Session = Depend
             db.add(ProductVariant(product_id=prod_id, variant_type="size", variant_value=sz))
 
     db.commit()
+    product_search_index.refresh_product(db, prod_id)
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
+    schedule_related_refresh([prod_id], with_partners=True)
     return {"message": "Cập nhật thành công"}
 
 
@@ -113,5 +132,10 @@ def delete_product(
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
     
     db.delete(db_prod)
+    stats.bump(db, stats.PRODUCTS, -1)
     db.commit()
+    product_search_index.remove_product(prod_id)
+    home_cache.invalidate()
+    bump_catalog_version()
+    get_cache().delete_tag(PRODUCT_COUNT_TAG)
     return {"message": "Xóa thành công"}
\ No newline at end of file
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException,Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.user import User
 from app.models.profile import Profile
 from app.schemas.admin_user import UserAdminResponse, UserUpdate, UserCreate
 from app.api.deps import get_current_active_admin
-from app.core.security import hash_password
+from app.core.security import hash_password_async
+from app.core import stats
+from app.core.user_cache import invalidate_user
 from typing import List
 from typing import Optional
 router = APIRouter()
 
 @router.get("", response_model=List[UserAdminResponse])
 def get_all_users(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin = Depends(get_current_active_admin),
     search: Optional[str] = Query(None),    
     is_admin: Optional[bool] = Query(None)
@@ -31,12 +35,7 @@ def get_all_users(
     return users
 
 
-@router.post("", response_model=UserAdminResponse)
-def create_user_system(
-    obj_in: UserCreate, 
-    db: Session = Depends(get_db),
-    current_admin = Depends(get_current_active_admin)
-):
+def _create_user(db: Session, obj_in: UserCreate, password_hash: str) -> UserAdminResponse:
     user_exists = db.query(User).filter(
         (User.username == obj_in.username) | (User.email == obj_in.email)
     ).first()
@@ -55,16 +54,28 @@ def create_user_system(
     new_user = User(
         username=obj_in.username,
         email=obj_in.email,
-        password=hash_password(obj_in.password), 
+        password=password_hash, 
         isAdmin=obj_in.isAdmin,
         is_active=obj_in.is_active,
         profile_id=new_profile.id
     )
     db.add(new_user)
+    stats.bump(db, stats.USERS)
     db.commit()
     db.refresh(new_user)
     
-    return new_user
+    return UserAdminResponse.model_validate(new_user, from_attributes=True)
+
+@router.post("", response_model=UserAdminResponse)
+async def create_user_system(
+    obj_in: UserCreate, 
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_active_admin)
+):
+    # Hash trước khi mở transaction để không giữ connection DB trong lúc chạy bcrypt
+    password_hash = await hash_password_async(obj_in.password)
+    # Session là I/O đồng bộ -> chạy trong threadpool
+    return await run_in_threadpool(_create_user, db, obj_in, password_hash)
 
 @router.patch("/{user_id}")
 def update_user_system(
@@ -77,6 +88,7 @@ def update_user_system(
     if not db_user:
         raise HTTPException(status_code=404, detail="Người dùng không tồn tại")
 
+    old_email = db_user.email
     user_data = obj_in.model_dump(include={"email", "isAdmin", "is_active"}, exclude_unset=True)
     for field in user_data:
         setattr(db_user, field, user_data[field])
@@ -90,6 +102,7 @@ def update_user_system(
             setattr(db_user.profile, field, profile_data[field])
     
     db.commit()
+    invalidate_user(old_email, db_user.email)
     return {"message": "Cập nhật thành công"}
 
 @router.delete("/{user_id}")
@@ -102,6 +115,9 @@ def delete_user(
     if not db_user:
         raise HTTPException(404, "Không tìm thấy người dùng")
     
+    email = db_user.email
     db.delete(db_user)
+    stats.bump(db, stats.USERS, -1)
     db.commit()
+    invalidate_user(email)
     return {"message": "Đã xóa người dùng"}
\ No newline at end of file
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
@@ -20,11 +21,19 @@ from app.schemas.userDto import (
     PasswordResetRequest,
     PasswordResetConfirm,
 )
-from app.core.security import hash_password, verify_password, create_access_token, decode_access_token
-from app.core.email_utils import generate_verification_code, send_verification_email, send_password_reset_email
+from app.core.security import (
+    hash_password_async,
+    verify_password_async,
+    password_needs_rehash,
+    create_access_token,
+    decode_access_token,
+)
+from app.core.email_utils import generate_verification_code, queue_verification_email, queue_password_reset_email
 from app.core.validators import validate_email, validate_password, validate_username
 from app.core.dependencies import get_current_user
 from app.core.google_oauth import oauth, save_oauth_state, get_oauth_state
+from app.core import stats
+from app.core.user_cache import invalidate_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -33,116 +42,145 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 VERIFICATION_CODE_EXPIRY_MINUTES = 15
 MAX_VERIFICATION_ATTEMPTS = 3
 
+def _create_registered_user(db: Session, user_in: UserCreate, password_hash: str) -> Token:
+    # Kiểm tra user đã tồn tại
+    user_exists = db.query(User).filter(
+        (User.email == user_in.email) | (User.username == user_in.username)
+    ).first()
+    
+    if user_exists:
+        logger.warning(f"Register attempt with existing email/username: {user_in.email}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username hoặc Email đã tồn tại"
+        )
+
+    # Tạo mã xác thực
+    verification_code = generate_verification_code()
+
+    # Tạo profile và user
+    new_profile = Profile(full_name=user_in.full_name)
+    db.add(new_profile)
+    db.flush()
+
+    new_user = User(
+        username=user_in.username,
+        email=user_in.email,
+        password=password_hash,
+        profile_id=new_profile.id,
+        is_active=False,
+        verification_code=verification_code
+    )
+    db.add(new_user)
+    stats.bump(db, stats.USERS)
+    # Email xác thực được gửi nền sau khi commit
+    queue_verification_email(db, new_user.email, verification_code)
+    db.commit()
+    db.refresh(new_user)
+    db.refresh(new_profile)
+
+    logger.info(f"New user registered: {new_user.email}")
+
+    token = create_access_token(subject=new_user.email)
+
+    return Token(
+        access_token=token,
+        token_type="bearer",
+        isActive=new_user.is_active,
+        user=UserResponse.model_validate(new_user)
+    )
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
     """Đăng ký tài khoản mới"""
     try:
         # Validate input
         validate_username(user_in.username)
         validate_email(user_in.email)
         validate_password(user_in.password)
-        
-        # Kiểm tra user đã tồn tại
-        user_exists = db.query(User).filter(
-            (User.email == user_in.email) | (User.username == user_in.username)
-        ).first()
-        
-        if user_exists:
-            logger.warning(f"Register attempt with existing email/username: {user_in.email}")
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Username hoặc Email đã tồn tại"
-            )
 
-        # Tạo mã xác thực
-        verification_code = generate_verification_code()
+        # Hash trước khi mở transaction để không giữ connection DB trong lúc chạy bcrypt
+        password_hash = await hash_password_async(user_in.password)
 
-        # Tạo profile và user
-        new_profile = Profile(full_name=user_in.full_name)
-        db.add(new_profile)
-        db.flush()
-
-        new_user = User(
-            username=user_in.username,
-            email=user_in.email,
-            password=hash_password(user_in.password),
-            profile_id=new_profile.id,
-            is_active=False,
-            verification_code=verification_code
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        db.refresh(new_profile)
-
-        # Gửi email xác thực (async sẽ tốt hơn)
-        email_sent = send_verification_email(new_user.email, verification_code)
-        if not email_sent:
-            logger.error(f"Failed to send verification email to {new_user.email}")
-
-        logger.info(f"New user registered: {new_user.email}")
-
-        token = create_access_token(subject=new_user.email)
-
-        return Token(
-            access_token=token,
-            token_type="bearer",
-            isActive=new_user.is_active,
-            user=UserResponse.model_validate(new_user)
-        )
+        # Session là I/O đồng bộ -> chạy trong threadpool, không chặn event loop
+        return await run_in_threadpool(_create_registered_user, db, user_in, password_hash)
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         logger.error(f"Registration error: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Lỗi hệ thống, vui lòng thử lại"
         )
 
+def _stored_password_hash(db: Session, email: str):
+    """Hash mật khẩu đang lưu (None nếu không có user); kết thúc transaction chỉ đọc trước khi chạy bcrypt"""
+    stored_hash = db.query(User.password).filter(User.email == email).scalar()
+    db.rollback()
+    return stored_hash
+
+def _complete_login(db: Session, email: str, new_hash: str = None) -> Token:
+    from sqlalchemy.orm import joinedload
+    user = db.query(User).options(joinedload(User.profile)).filter(User.email == email).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Email hoặc mật khẩu không đúng"
+        )
+
+    # Kiểm tra email đã xác minh chưa
+    # if not user.is_active:
+    #     logger.warning(f"Login attempt with unverified email: {email}")
+    #     raise HTTPException(
+    #         status_code=status.HTTP_403_FORBIDDEN,
+    #         detail="Vui lòng xác minh email trước khi đăng nhập"
+    #     )
+
+    if new_hash:
+        user.password = new_hash
+
+    # Update last login time (optional)
+    user.last_login = datetime.utcnow()
+    db.commit()
+
+    token = create_access_token(subject=user.email)
+    logger.info(f"User logged in: {user.email}")
+
+    return Token(
+        access_token=token,
+        token_type="bearer",
+        isActive=user.is_active,
+        user=UserResponse.model_validate(user)
+    )
+
 @router.post("/login", response_model=Token)
-def login(user_in: UserLogin, db: Session = Depends(get_db)):
+async def login(user_in: UserLogin, db: Session = Depends(get_db)):
     """Đăng nhập - chỉ cho phép user đã xác minh email"""
     try:
-        from sqlalchemy.orm import joinedload
-        user = db.query(User).options(joinedload(User.profile)).filter(User.email == user_in.email).first()
+        stored_hash = await run_in_threadpool(_stored_password_hash, db, user_in.email)
         
-        if not user:
+        if not stored_hash:
             logger.warning(f"Login attempt with non-existent email: {user_in.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email hoặc mật khẩu không đúng"
             )
-        
-        if not verify_password(user_in.password, user.password):
+
+        if not await verify_password_async(user_in.password, stored_hash):
             logger.warning(f"Failed login attempt for user: {user_in.email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email hoặc mật khẩu không đúng"
             )
 
-        # Kiểm tra email đã xác minh chưa
-        # if not user.is_active:
-        #     logger.warning(f"Login attempt with unverified email: {user_in.email}")
-        #     raise HTTPException(
-        #         status_code=status.HTTP_403_FORBIDDEN,
-        #         detail="Vui lòng xác minh email trước khi đăng nhập"
-        #     )
-
-        # Update last login time (optional)
-        user.last_login = datetime.utcnow()
-        db.commit()
-
-        token = create_access_token(subject=user.email)
-        logger.info(f"User logged in: {user.email}")
+        # Cost bcrypt đã đổi -> hash lại bằng mật khẩu vừa nhập
+        new_hash = None
+        if password_needs_rehash(stored_hash):
+            new_hash = await hash_password_async(user_in.password)
 
-        return Token(
-            access_token=token,
-            token_type="bearer",
-            isActive=user.is_active,
-            user=UserResponse.model_validate(user)
-        )
+        return await run_in_threadpool(_complete_login, db, user_in.email, new_hash)
     
     except HTTPException:
         raise
@@ -177,6 +215,7 @@ def verify_email(payload: VerifyCodeRequest, db: Session = Depends(get_db)):
         user.is_active = True
         user.verification_code = None
         db.commit()
+        invalidate_user(user.email)
         db.refresh(user)
         
         logger.info(f"Email verified for user: {user.email}")
@@ -223,19 +262,11 @@ def resend_verification(payload: ResendVerificationRequest, db: Session = Depend
         verification_code = generate_verification_code()
         user.verification_code = verification_code
         user.verification_attempts = (user.verification_attempts or 0) + 1
+        queue_verification_email(db, user.email, verification_code)
         
         db.commit()
         db.refresh(user)
         
-        # Gửi email
-        email_sent = send_verification_email(user.email, verification_code)
-        if not email_sent:
-            logger.error(f"Failed to resend verification email to {user.email}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Không thể gửi email, vui lòng thử lại"
-            )
-        
         logger.info(f"Verification email resent to: {user.email}")
         return {"message": "Đã gửi lại mã xác thực"}
     
@@ -260,28 +291,30 @@ def forgot_password(payload: PasswordResetRequest, db: Session = Depends(get_db)
         reset_code = generate_verification_code() 
         
         user.password_reset_token = reset_code 
+        queue_password_reset_email(db, user.email, reset_code)
         db.commit()
 
-        email_sent = send_password_reset_email(user.email, reset_code)
-        
-        if not email_sent:
-            raise HTTPException(status_code=500, detail="Không thể gửi email")
-
         return {"message": "Mã khôi phục đã được gửi qua email"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Lỗi hệ thống")
 
-@router.post("/reset-password")
-def reset_password(payload: PasswordResetConfirm, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.password_reset_token == payload.token).first()
+def _apply_password_reset(db: Session, reset_token: str, password_hash: str) -> None:
+    user = db.query(User).filter(User.password_reset_token == reset_token).first()
 
     if not user:
         raise HTTPException(status_code=400, detail="Mã xác nhận không đúng hoặc đã hết hạn")
 
-    user.password = hash_password(payload.new_password)
+    user.password = password_hash
     user.password_reset_token = None 
     db.commit()
+    invalidate_user(user.email)
+
+@router.post("/reset-password")
+async def reset_password(payload: PasswordResetConfirm, db: Session = Depends(get_db)):
+    # Hash trước khi mở transaction để không giữ connection DB trong lúc chạy bcrypt
+    password_hash = await hash_password_async(payload.new_password)
+    await run_in_threadpool(_apply_password_reset, db, payload.token, password_hash)
 
     return {"message": "Mật khẩu đã được thay đổi thành công"}
 @router.get("/users/me", response_model=UserResponse)
@@ -307,6 +340,7 @@ def update_profile(profile_in: ProfileUpdate, current_user: User = Depends(get_c
             profile.dob = profile_in.dob
         
         db.commit()
+        invalidate_user(current_user.email)
         db.refresh(profile)
         
         logger.info(f"Profile updated for user: {current_user.email}")
@@ -326,9 +360,9 @@ async def google_login(request: Request):
     from app.core.config import settings
     import secrets
     try:
-        # Generate state và lưu vào in-memory store
+        # Generate state và lưu vào cache dùng chung (mọi worker đều đọc được)
         state = secrets.token_urlsafe(32)
-        save_oauth_state(state, {'redirect_uri': settings.GOOGLE_REDIRECT_URI})
+        await save_oauth_state(state, {'redirect_uri': settings.GOOGLE_REDIRECT_URI})
         
         # Pass state qua URL, thêm prompt để buộc chọn tài khoản
         url = await oauth.google.authorize_redirect(
@@ -342,6 +376,46 @@ async def google_login(request: Request):
         logger.error(f"Google login error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Lỗi đăng nhập Google")
 
+def _activate_google_user(db: Session, email: str) -> bool:
+    """True nếu user đã tồn tại (kích hoạt nếu cần); False thì cần tạo mới"""
+    user = db.query(User).filter(User.email == email).first()
+
+    if not user:
+        # Kết thúc transaction chỉ đọc trước khi chạy bcrypt
+        db.rollback()
+        return False
+
+    # User đã tồn tại - update thông tin nếu cần
+    if not user.is_active:
+        user.is_active = True
+        db.commit()
+        invalidate_user(user.email)
+    return True
+
+def _create_google_user(db: Session, email: str, name: str, google_id: str, avatar: str, password_hash: str) -> None:
+    # Tạo user mới
+    new_profile = Profile(
+        full_name=name,
+        avatar=avatar
+    )
+    db.add(new_profile)
+    db.flush()
+
+    # Tạo username từ email (hoặc google_id)
+    username = email.split('@')[0] + '_' + google_id[:8]
+
+    user = User(
+        username=username,
+        email=email,
+        password=password_hash,
+        profile_id=new_profile.id,
+        is_active=True,  # Google OAuth tự động verify
+        verification_code=None
+    )
+    db.add(user)
+    stats.bump(db, stats.USERS)
+    db.commit()
+
 @router.get("/google/callback")
 async def google_callback(request: Request, db: Session = Depends(get_db)):
     """Xử lý callback từ Google sau khi user đăng nhập"""
@@ -349,14 +423,14 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         import httpx
         from app.core.config import settings
         
-        # Verify state từ in-memory store
+        # Verify state từ cache dùng chung
         state = request.query_params.get('state')
         code = request.query_params.get('code')
         
         if not state or not code:
             raise HTTPException(status_code=400, detail="Missing state or code")
         
-        if not get_oauth_state(state):
+        if not await get_oauth_state(state):
             raise HTTPException(status_code=400, detail="Invalid or expired state")
         
         # Manually exchange code for token
@@ -387,41 +461,13 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         google_id = user_info.get('sub')
         avatar = user_info.get('picture')
         
-        # Kiểm tra user đã tồn tại chưa
-        from sqlalchemy.orm import joinedload
-        user = db.query(User).options(joinedload(User.profile)).filter(User.email == email).first()
-        
-        if user:
-            # User đã tồn tại - update thông tin nếu cần
-            if not user.is_active:
-                user.is_active = True
-                db.commit()
-        else:
-            # Tạo user mới
-            new_profile = Profile(
-                full_name=name,
-                avatar=avatar
-            )
-            db.add(new_profile)
-            db.flush()
-            
-            # Tạo username từ email (hoặc google_id)
-            username = email.split('@')[0] + '_' + google_id[:8]
-            
-            user = User(
-                username=username,
-                email=email,
-                password=hash_password(google_id),  # Password random từ google_id
-                profile_id=new_profile.id,
-                is_active=True,  # Google OAuth tự động verify
-                verification_code=None
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+        # Truy vấn DB là I/O đồng bộ -> chạy trong threadpool, không chặn event loop
+        if not await run_in_threadpool(_activate_google_user, db, email):
+            password_hash = await hash_password_async(google_id)  # Password random từ google_id
+            await run_in_threadpool(_create_google_user, db, email, name, google_id, avatar, password_hash)
         
         # Tạo JWT token cho hệ thống
-        access_token = create_access_token(subject=user.email)
+        access_token = create_access_token(subject=email)
         frontend_url = f"http://localhost:3000/login?token={access_token}"
         return RedirectResponse(url=frontend_url)
         
@@ -1,22 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.db.session import get_async_db
 from app.models.cart_item import CartItem
 from app.models.product import Product
-from app.api.deps import get_current_user 
-from typing import List
+from app.api.deps import get_current_user_async
+from app.core.cart import add_lines, cart_summary, missing_products, replace_lines, set_lines
+from app.models.address import Address
+from app.schemas.cart import CartBulkUpdate, CartQuantityUpdate
+from typing import List, Optional
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 @router.get("")
-def get_cart(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+async def get_cart(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
 ):
-    cart_items = db.query(CartItem)\
-        .options(joinedload(CartItem.product))\
-        .filter(CartItem.user_id == current_user.id)\
-        .all()
+    cart_items = (await db.scalars(
+        select(CartItem)
+        .options(joinedload(CartItem.product))
+        .where(CartItem.user_id == current_user.id)
+    )).all()
     
     return [
         {
@@ -30,48 +36,87 @@ def get_cart(
         } for item in cart_items
     ]
 
+@router.get("/summary")
+async def get_cart_summary(
+    address_id: Optional[int] = Query(None, description="Mặc định: địa chỉ mặc định của user"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    """Giỏ hàng + tổng tiền + tồn kho + phí ship trong 1 lần gọi (trang giỏ hàng không cần gọi thêm)"""
+    if address_id is not None:
+        owned = await db.scalar(select(Address.id).where(Address.id == address_id, Address.user_id == current_user.id))
+        if not owned:
+            raise HTTPException(status_code=404, detail="Địa chỉ không hợp lệ")
+    return await cart_summary(db, current_user.id, address_id)
+
 @router.post("/add")
-def add_to_cart(
+async def add_to_cart(
     product_id: int,
-    quantity: int = 1, 
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user) 
+    quantity: int = Query(1, ge=1), 
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async) 
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    if await missing_products(db, [product_id]):
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
 
-    item = db.query(CartItem).filter(
-        CartItem.user_id == current_user.id,
-        CartItem.product_id == product_id
-    ).first()
+    await add_lines(db, current_user.id, {product_id: quantity})
+    await db.commit()
+    return {"message": "Đã thêm vào giỏ hàng"}
 
-    if item:
-        item.quantity += quantity 
+@router.put("")
+async def update_cart(
+    body: CartBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    """Cập nhật nhiều dòng trong 1 transaction: replace=False gộp với giỏ hiện tại, True thay toàn bộ giỏ"""
+    lines = {}
+    for line in body.items:
+        lines[line.product_id] = line.quantity
+
+    missing = await missing_products(db, [pid for pid, qty in lines.items() if qty > 0])
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Sản phẩm không tồn tại: {missing}")
+
+    if body.replace:
+        await replace_lines(db, current_user.id, lines)
     else:
-        db.add(CartItem(user_id=current_user.id, product_id=product_id, quantity=quantity))
+        await set_lines(db, current_user.id, lines)
+    await db.commit()
+    return {"message": "Cập nhật giỏ hàng thành công"}
 
-    db.commit()
-    return {"message": "Đã thêm vào giỏ hàng"}
+@router.put("/items/{product_id}")
+async def set_cart_quantity(
+    product_id: int,
+    body: CartQuantityUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
+):
+    if body.quantity > 0 and await missing_products(db, [product_id]):
+        raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
+
+    await set_lines(db, current_user.id, {product_id: body.quantity})
+    await db.commit()
+    return {"message": "Cập nhật giỏ hàng thành công"}
 
 @router.delete("/{id}")
-def delete_or_decrease(
+async def delete_or_decrease(
     id: int,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async)
 ):
-    item = db.query(CartItem).filter(
-        CartItem.id == id,
-        CartItem.user_id == current_user.id
-    ).first()
-
-    if not item:
-        raise HTTPException(status_code=404, detail="Sản phẩm trong giỏ không tồn tại")
-
-    if item.quantity > 1:
-        item.quantity -= 1
-    else:
-        db.delete(item)
+    # Giảm 1 nếu còn > 1, ngược lại xóa dòng (không SELECT trước)
+    result = await db.execute(
+        update(CartItem)
+        .where(CartItem.id == id, CartItem.user_id == current_user.id, CartItem.quantity > 1)
+        .values(quantity=CartItem.quantity - 1)
+    )
+    if result.rowcount == 0:
+        result = await db.execute(
+            delete(CartItem).where(CartItem.id == id, CartItem.user_id == current_user.id)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Sản phẩm trong giỏ không tồn tại")
 
-    db.commit()
-    return {"message": "Cập nhật giỏ hàng thành công"}
\ No newline at end of file
+    await db.commit()
+    return {"message": "Cập nhật giỏ hàng thành công"}
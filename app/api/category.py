@@ -1,22 +1,24 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func 
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.session import get_db
+from app.db.replicas import get_async_read_db
 from app.models.category import Category
 from app.models.product import Product 
+from app.core.http_cache import http_cache
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
-@router.get("/all")
-def get_all_categories(db: Session = Depends(get_db)):
-    results = db.query(
-        Category, 
-        func.count(Product.id).label("total")
-    ).outerjoin(Product, Category.id == Product.category_id)\
-     .filter(Category.is_active == True)\
-     .group_by(Category.id)\
-     .all()
+@router.get("/all", dependencies=[Depends(http_cache(s_maxage=300))])
+async def get_all_categories(db: AsyncSession = Depends(get_async_read_db)):
+    results = (await db.execute(
+        select(
+            Category, 
+            func.count(Product.id).label("total")
+        ).outerjoin(Product, Category.id == Product.category_id)
+         .where(Category.is_active == True)
+         .group_by(Category.id)
+    )).all()
 
     return [
         {
@@ -25,4 +27,4 @@ def get_all_categories(db: Session = Depends(get_db)):
             "img": cat.image_url,
             "product_count": f"{total}+"
         } for cat, total in results
-    ]
\ No newline at end of file
+    ]
@@ -2,9 +2,11 @@ from fastapi import Depends, HTTPException, status, Request
 from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db, get_async_db
 from app.core.security import decode_access_token
 from app.models.user import User
+from app.core.user_cache import get_user_by_email, get_user_by_email_async
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -28,7 +30,7 @@ def get_current_user(
     except Exception:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_by_email(db, email)
     if user is None: 
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -77,9 +79,50 @@ def get_optional_current_user(
         if email is None:
             return None
             
-        user = db.query(User).filter(User.email == email).first()
+        user = get_user_by_email(db, email)
         return user
         
     except Exception:
         return None
 
+
+def _email_from_token(token: str) -> Optional[str]:
+    try:
+        return decode_access_token(token).get("sub")
+    except Exception:
+        return None
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Giống get_current_user nhưng dùng AsyncSession cho các route async"""
+    email = _email_from_token(token)
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user = await get_user_by_email_async(db, email)
+    if user is None: 
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+async def get_optional_current_user_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[User]:
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+
+    email = _email_from_token(auth_header.split(" ")[1])
+    if email is None:
+        return None
+    return await get_user_by_email_async(db, email)
+
@@ -1,40 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.favorite import Favorite
 from app.models.product import Product
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_async
+from app.core.product_cards import card_list_adapter, card_select, fetch_cards, json_response
+from app.schemas.product import ProductResponse
+from typing import List
 
 router = APIRouter(prefix="/favorites", tags=["Favorites"])
 
-@router.get("/")
-def get_favorites(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user) 
+@router.get("/", response_model=List[ProductResponse])
+async def get_favorites(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_async) 
 ):
-    favorites = db.query(Product).join(
-        Favorite, Favorite.product_id == Product.id
-    ).filter(Favorite.user_id == current_user.id).all()
+    favorites = await fetch_cards(
+        db,
+        card_select()
+        .join(Favorite, Favorite.product_id == Product.id)
+        .where(Favorite.user_id == current_user.id)
+    )
+    for card in favorites:
+        card["is_favorite"] = True
     
-    return favorites
+    return json_response(card_list_adapter, favorites)
 
 
 @router.post("/{product_id}")
-def toggle_favorite(product_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def toggle_favorite(product_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
 
-    fav = db.query(Favorite).filter(
+    fav = await db.scalar(select(Favorite).where(
         Favorite.user_id == current_user.id,
         Favorite.product_id == product_id
-    ).first()
+    ))
 
     if fav:
-        db.delete(fav)
-        db.commit()
+        await db.delete(fav)
+        await db.commit()
         return {"status": "removed", "is_favorite": False}
 
     db.add(Favorite(user_id=current_user.id, product_id=product_id))
-    db.commit()
-    return {"status": "added", "is_favorite": True}
\ No newline at end of file
+    await db.commit()
+    return {"status": "added", "is_favorite": True}
@@ -1,58 +1,28 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.session import get_db
-from app.models.product import Product
-from app.models.category import Category
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.replicas import get_async_read_db
 from app.models.favorite import Favorite
-from app.api.deps import get_optional_current_user
+from app.api.deps import get_optional_current_user_async
+from app.core.home_cache import home_cache
+from app.core.http_cache import http_cache
+from app.core.responses import ORJSONResponse, RawJSONResponse
 
 router = APIRouter(prefix="/home", tags=["Home"])
 
-@router.get("/")
-def get_home_page_data(db: Session = Depends(get_db), current_user = Depends(get_optional_current_user)):
-    categories_query = db.query(
-        Category, 
-        func.count(Product.id).label("total")
-    ).outerjoin(Product, Category.id == Product.category_id)\
-     .filter(Category.is_active == True)\
-     .group_by(Category.id).limit(8).all()
+@router.get("/", dependencies=[Depends(http_cache(s_maxage=30, personalized=True))])
+async def get_home_page_data(db: AsyncSession = Depends(get_async_read_db), current_user = Depends(get_optional_current_user_async)):
+    payload, body = await home_cache.get()
 
-    categories_data = [
-        {
-            "id": cat.id,
-            "name": cat.name,
-            "img": cat.image_url,
-            "product_count": f"{total/1000:.1f}k+" if total >= 1000 else f"{total}+"
-        } for cat, total in categories_query
-    ]
+    if not current_user:
+        return RawJSONResponse(body)
 
-    products = db.query(Product).order_by(Product.sold_count.desc()).limit(20).all() 
-    
-    fav_ids = set() 
-    if current_user:
-        fav_ids = {f.product_id for f in db.query(Favorite.product_id).filter(Favorite.user_id == current_user.id).all()}
+    fav_ids = set((await db.scalars(select(Favorite.product_id).where(Favorite.user_id == current_user.id))).all())
 
-    best_sellers_data = []
-    for p in products:
-        product_dict = {
-            "id": p.id,
-            "name": p.name,
-            "description": p.description,
-            "price": p.price,
-            "original_price": p.original_price,
-            "discount_percent": p.discount_percent,
-            "main_image": p.main_image,
-            "rating_avg": p.rating_avg,
-            "reviews_count": p.reviews_count,
-            "sold_count": p.sold_count,
-            "category_id": p.category_id,
-            "is_new": p.is_new,
-            "is_favorite": p.id in fav_ids 
-        }
-        best_sellers_data.append(product_dict)
-
-    return {
-        "featured_categories": categories_data,
-        "best_sellers": best_sellers_data
-    }
\ No newline at end of file
+    # payload đã là kiểu JSON thuần -> encode thẳng, bỏ qua jsonable_encoder
+    return ORJSONResponse({
+        "featured_categories": payload["featured_categories"],
+        "best_sellers": [
+            {**p, "is_favorite": p["id"] in fav_ids} for p in payload["best_sellers"]
+        ]
+    })
@@ -1,48 +1,206 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import asyncio
+import base64
+import json
+from app.db.session import AsyncSessionLocal, get_async_db
 from app.models.notification import Notification
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_async, _email_from_token
 from app.models.user import User
-from app.schemas.notification import NotificationResponse
+from app.schemas.notification import NotificationResponse, StreamTicketResponse, UnreadCountResponse
+from app.core.notifications import decrement_unread, push_event, unread_count
+from app.core.realtime import hub, issue_stream_ticket, redeem_stream_ticket
+from app.core.user_cache import get_user_by_email_async
+from app.core.config import settings
 
 router = APIRouter()
 
+
+def _encode_cursor(notif_id: int) -> str:
+    raw = json.dumps({"id": notif_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+
+
 @router.get("/", response_model=List[NotificationResponse])
-def get_my_notifications(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+async def get_my_notifications(
+    response: Response,
+    size: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor lấy từ header X-Next-Cursor của trang trước"),
+    since: Optional[int] = Query(None, description="Chỉ lấy thông báo có id lớn hơn (polling tăng dần)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Body vẫn là danh sách thông báo như trước; cursor trang sau nằm ở header X-Next-Cursor
+    (không có header = hết), số chưa đọc lấy ở GET /notifications/unread-count
+    """
+    # Keyset theo (created_at, id) giảm dần, đi đúng index (user_id, created_at)
+    query = select(Notification).where(Notification.user_id == current_user.id)
+    if since is not None:
+        query = query.where(Notification.id > since)
+    if after:
+        last_id = _decode_cursor(after)
+        # So với created_at đang lưu trong DB của thông báo cuối trang trước
+        created_at = select(Notification.created_at).where(Notification.id == last_id).scalar_subquery()
+        query = query.where(or_(
+            Notification.created_at < created_at,
+            and_(Notification.created_at == created_at, Notification.id < last_id),
+        ))
+
+    items = (await db.scalars(
+        query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(size + 1)
+    )).all()
+    has_more = len(items) > size
+    items = items[:size]
+
+    if has_more:
+        response.headers["X-Next-Cursor"] = _encode_cursor(items[-1].id)
+    return items
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    return {"unread": await unread_count(db, current_user.id)}
+
+def _format_sse(event: dict) -> str:
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event.get('data', {}), ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.post("/stream-ticket", response_model=StreamTicketResponse)
+async def create_stream_ticket(current_user: User = Depends(get_current_user_async)):
+    """Vé dùng 1 lần, hạn ngắn để mở /notifications/stream?ticket=... từ EventSource"""
+    return {
+        "ticket": await issue_stream_ticket(current_user.email),
+        "expires_in": settings.SSE_TICKET_TTL_SECONDS,
+    }
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="Vé từ POST /notifications/stream-ticket, dùng khi client (EventSource) không gửi được header Authorization")
 ):
-    return db.query(Notification).filter(
-        Notification.user_id == current_user.id
-    ).order_by(Notification.created_at.desc()).all()
+    """
+    Server-Sent Events: đẩy thông báo mới ngay khi được tạo thay vì polling GET /notifications.
+    Kết nối lại với header Last-Event-ID sẽ nhận bù các thông báo bị lỡ (cần vé mới).
+    """
+    email = None
+    auth_header = request.headers.get("Authorization")
+    if ticket:
+        email = await redeem_stream_ticket(ticket)
+    elif auth_header and auth_header.startswith("Bearer "):
+        email = _email_from_token(auth_header.split(" ")[1])
+    if email is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    last_event_id = request.headers.get("Last-Event-ID", "")
+
+    # Session chỉ dùng lúc mở kết nối, không giữ connection DB suốt thời gian stream
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_email_async(db, email)
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_id = user.id
+
+        # Đăng ký trước khi đọc bù để không lọt thông báo tạo ra ở giữa
+        queue = hub.subscribe(user_id)
+        try:
+            backlog = []
+            if last_event_id.isdigit():
+                backlog = [push_event(n) for n in (await db.scalars(
+                    select(Notification)
+                    .where(Notification.user_id == user_id, Notification.id > int(last_event_id))
+                    .order_by(Notification.id)
+                    .limit(settings.SSE_QUEUE_SIZE)
+                )).all()]
+            unread = await unread_count(db, user_id)
+        except Exception:
+            hub.unsubscribe(user_id, queue)
+            raise
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            yield _format_sse({"event": "unread", "data": {"unread": unread}})
+            last_sent = 0
+            for event in backlog:
+                last_sent = event["id"]
+                yield _format_sse(event)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event.get("id", last_sent + 1) <= last_sent:
+                    continue # đã gửi trong phần đọc bù
+                yield _format_sse(event)
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/mark-all-read")
-def mark_all_as_read(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+async def mark_all_as_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    db.query(Notification).filter(
-        Notification.user_id == current_user.id, 
-        Notification.is_read == False
-    ).update({"is_read": True})
-    db.commit()
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.user_id == current_user.id, Notification.is_read == False)
+        .values(is_read=True)
+    )
+    await decrement_unread(db, current_user.id, result.rowcount)
+    await db.commit()
     return {"message": "Đã đánh dấu tất cả là đã đọc"}
 
 @router.put("/{notification_id}/read")
-def mark_one_as_read(
+async def mark_one_as_read(
     notification_id: int,
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    notif = db.query(Notification).filter(
-        Notification.id == notification_id, 
-        Notification.user_id == current_user.id
-    ).first()
-    if not notif:
-        raise HTTPException(status_code=404, detail="Không tìm thấy thông báo")
-    
-    notif.is_read = True
-    db.commit()
-    return {"message": "Đã đọc"}
\ No newline at end of file
+    # UPDATE có điều kiện is_read = False để 2 request song song không trừ bộ đếm 2 lần
+    result = await db.execute(
+        update(Notification)
+        .where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id,
+            Notification.is_read == False,
+        )
+        .values(is_read=True)
+    )
+    if result.rowcount == 0:
+        exists = await db.scalar(select(Notification.id).where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id
+        ))
+        if not exists:
+            raise HTTPException(status_code=404, detail="Không tìm thấy thông báo")
+
+    await decrement_unread(db, current_user.id, result.rowcount)
+    await db.commit()
+    return {"message": "Đã đọc"}
@@ -8,6 +8,8 @@ from app.models.cart_item import CartItem
 from app.models.product import Product
 from app.models.address import Address
 from app.core.shipping import get_ghn_shipping_details
+from app.core.home_cache import home_cache
+from app.core.checkout import place_order
 from app.schemas.order import OrderResponse, OrderCreateRequest
 from app.api.deps import get_current_user
 from typing import List
@@ -29,56 +31,22 @@ def createOrder(
     if not address:
         raise HTTPException(status_code=404, detail="Địa chỉ giao hàng không hợp lệ")
     
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    if not cart_items:
+    if not db.query(CartItem.id).filter(CartItem.user_id == current_user.id).first():
         raise HTTPException(status_code=400, detail="Giỏ hàng trống")
 
+    user_id = current_user.id
+    address_id, district_id, ward_code = address.id, address.district_id, address.ward_code
+    # Trả connection về pool trước khi gọi GHN, transaction checkout chỉ bắt đầu sau đó
+    db.commit()
+
     # GỌI 1 LẦN DUY NHẤT ĐỂ LẤY TẤT CẢ THÔNG TIN SHIP
     ship_details = get_ghn_shipping_details(
-        to_district_id=address.district_id,
-        to_ward_code=address.ward_code
+        to_district_id=district_id,
+        to_ward_code=ward_code
     )
 
-    new_order = Order(
-        user_id=current_user.id,
-        address_id=address.id,
-        shipping_fee=ship_details["fee"],
-        total_amount=0,
-        subtotal=0,
-        expected_delivery_date=ship_details["expected_delivery"],
-        delivery_deadline=ship_details["deadline"],
-        shipping_status="PENDING",
-        payment_status="PENDING"
-    )
-
-    db.add(new_order)
-    db.flush() 
-
-    total_amount_products = 0
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).with_for_update().first()
-        if not product or product.stock < item.quantity:
-            db.rollback() 
-            raise HTTPException(status_code=400, detail=f"Sản phẩm {product.name if product else 'ID '+str(item.product_id)} không đủ hàng")
-
-        product.stock -= item.quantity
-        total_amount_products += product.price * item.quantity
-
-        db.add(OrderItem(
-            order_id=new_order.id,
-            product_id=product.id,
-            quantity=item.quantity,
-            price_at_purchase=product.price,
-            selected_size=getattr(item, 'selected_size', None), 
-            selected_color=getattr(item, 'selected_color', None) 
-        ))
-        db.delete(item)
-
-    new_order.total_amount = total_amount_products
-    new_order.subtotal = total_amount_products + ship_details["fee"]
-
-    db.commit()
-    db.refresh(new_order)
+    new_order = place_order(db, user_id, address_id, ship_details)
+    home_cache.invalidate()
 
     return new_order
 
@@ -7,6 +7,8 @@ from app.api.deps import get_current_user, get_db
 from app.core.config import settings
 from app.models.order import Order, PaymentStatus
 from app.models.notification import Notification
+from app.core.notifications import notify
+from app.core.revenue import set_payment_status
 
 router = APIRouter(prefix="/payment", tags=["Payment"])
 
@@ -77,15 +79,15 @@ def confirm_order_manual(
     if not order:
         raise HTTPException(status_code=404, detail="Không tìm thấy đơn hàng")
 
-    order.payment_status = PaymentStatus.PAID
-    
-    notification = Notification(
-        user_id=order.user_id,
-        title="Thanh toán thành công",
-        content=f"Đơn hàng #{order.id} của bạn đã được thanh toán thành công!",
-        type="payment"
-    )
-    db.add(notification)
+    # Xác nhận trùng (gọi lại / 2 request cùng lúc) không cộng doanh thu, không báo lại lần nữa
+    if set_payment_status(db, order, PaymentStatus.PAID):
+        notify(
+            db,
+            user_id=order.user_id,
+            title="Thanh toán thành công",
+            content=f"Đơn hàng #{order.id} của bạn đã được thanh toán thành công!",
+            type="payment"
+        )
     db.commit()
 
     return {"status": "success", "message": "Order updated to PAID"}
@@ -1,22 +1,66 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from decimal import Decimal
-from sqlalchemy import desc
-from app.db.session import get_db
+import base64
+import json
+from sqlalchemy import desc, func, select
+from app.db.replicas import get_async_read_db, run_with_read_db
 from app.models.product import Product
 from app.models.favorite import Favorite
 from app.models.user import User
 from app.models.category import Category
 from app.schemas.product import ProductCreate, ProductResponse, PaginatedProductResponse, ProductDetailResponse
 from app.api.deps import get_current_active_admin
-from app.api.deps import get_optional_current_user
+from app.api.deps import get_optional_current_user_async
+from app.core.search import product_search_index
+from app.core.product_cards import card_select, fetch_cards, json_response
+from app.core.related import related_ids
+from app.core.config import settings
+from app.core.cache import aget_or_set
+from app.core.http_cache import http_cache
 router = APIRouter(prefix="/products", tags=["Products"])
 
+_page_adapter = TypeAdapter(PaginatedProductResponse)
+_detail_adapter = TypeAdapter(ProductDetailResponse)
 
-@router.get("/", response_model=PaginatedProductResponse) 
-def read_products(
-    db: Session = Depends(get_db),
+
+def _encode_cursor(product_id: int) -> str:
+    raw = json.dumps({"id": product_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+
+
+PRODUCT_COUNT_TAG = "products:count"
+
+
+async def _cached_count(db: AsyncSession, key: tuple, stmt) -> int:
+    """COUNT(*) của listing được cache ngắn hạn theo bộ filter (dùng cho chế độ cursor)"""
+    return await aget_or_set(
+        f"products:count:{key!r}",
+        lambda: _count(db, stmt),
+        settings.PRODUCT_COUNT_CACHE_SECONDS,
+        tags=(PRODUCT_COUNT_TAG,),
+    )
+
+
+async def _count(db: AsyncSession, stmt) -> int:
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
+@router.get("/", response_model=PaginatedProductResponse, dependencies=[Depends(http_cache(s_maxage=30, personalized=True))])
+async def read_products(
+    db: AsyncSession = Depends(get_async_read_db),
     page: int = Query(1, ge=1),
     size: int = Query(12, ge=1, le=100), 
     min_price: Optional[Decimal] = Query(None),
@@ -24,67 +68,107 @@ def read_products(
     category_id: Optional[int] = Query(None),
     rating: Optional[int] = Query(None, ge=1, le=5),
     search: Optional[str] = Query(None),
-    current_user = Depends(get_optional_current_user)
+    after: Optional[str] = Query(None, description="Cursor lấy từ next_cursor của trang trước"),
+    current_user = Depends(get_optional_current_user_async)
 ):
-    query = db.query(Product)\
+    query = card_select()\
         .join(Category, Product.category_id == Category.id)\
-        .filter(Category.is_active == True and Product.is_active == True)
+        .where(Category.is_active == True and Product.is_active == True)
        
         
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        query = query.where(Product.category_id == category_id)
     if min_price:
-        query = query.filter(Product.price >= min_price)
+        query = query.where(Product.price >= min_price)
     if max_price:
-        query = query.filter(Product.price <= max_price)
-    if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query = query.where(Product.price <= max_price)
     if rating:
-        query = query.filter(Product.rating_avg >= rating)
-
-    # 3. Pagination & Sorting
-    query = query.order_by(desc(Product.id))
-    total_items = query.count()
-    total_pages = (total_items + size - 1) // size
-    skip = (page - 1) * size
-    products = query.offset(skip).limit(size).all()
-
+        query = query.where(Product.rating_avg >= rating)
 
     fav_set = set()
 
     if current_user:
-        fav_ids = db.query(Favorite.product_id).filter(Favorite.user_id == current_user.id).all()
-        fav_set = {f[0] for f in fav_ids}
+        fav_set = set((await db.scalars(
+            select(Favorite.product_id).where(Favorite.user_id == current_user.id)
+        )).all())
 
-    final_products = []
-    
-    for p in products:
-        product_data = ProductResponse.model_validate(p) 
-        
-        product_data.is_favorite = (p.id in fav_set)
+    skip = (page - 1) * size
+    last_id = _decode_cursor(after) if after else None
+    if search:
+        # Xếp hạng theo search index, các filter còn lại chỉ lấy id
+        ranked_ids = await run_in_threadpool(
+            run_with_read_db, lambda session: product_search_index.search(session, search)
+        )
+        matched = set()
+        if ranked_ids:
+            matched = set((await db.scalars(
+                query.where(Product.id.in_(ranked_ids)).with_only_columns(Product.id)
+            )).all())
+        ordered_ids = [pid for pid in ranked_ids if pid in matched]
+
+        if last_id is not None:
+            if last_id not in matched:
+                raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+            skip = ordered_ids.index(last_id) + 1
+
+        total_items = len(ordered_ids)
+        page_ids = ordered_ids[skip:skip + size]
+        has_more = skip + size < total_items
+        by_id = {}
+        if page_ids:
+            by_id = {card["id"]: card for card in await fetch_cards(
+                db, card_select().where(Product.id.in_(page_ids)), fav_set
+            )}
+        products = [by_id[pid] for pid in page_ids if pid in by_id]
+    elif last_id is not None:
+        # Keyset: seek thẳng tới id < cursor thay vì OFFSET, tổng số lấy từ cache
+        total_items = await _cached_count(db, (category_id, min_price, max_price, rating), query)
+        products = await fetch_cards(
+            db, query.where(Product.id < last_id).order_by(desc(Product.id)).limit(size + 1), fav_set
+        )
+        has_more = len(products) > size
+        products = products[:size]
+    else:
+        # 3. Pagination & Sorting
+        query = query.order_by(desc(Product.id))
+        total_items = await _count(db, query)
+        products = await fetch_cards(db, query.offset(skip).limit(size), fav_set)
+        has_more = skip + size < total_items
+    total_pages = (total_items + size - 1) // size
+    next_cursor = _encode_cursor(products[-1]["id"]) if (has_more and products) else None
 
-        final_products.append(product_data)
-    return {
-        "items": final_products, 
+    return json_response(_page_adapter, {
+        "items": products, 
         "total": total_items,
         "page": page,
         "size": size,
-        "pages": total_pages
-    }
+        "pages": total_pages,
+        "next_cursor": next_cursor
+    })
 
 # app/api/v1/endpoints/products.py
 
-@router.get("/{id}", response_model=ProductDetailResponse)
-def read_product_detail(id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == id).first()
+@router.get("/{id}", response_model=ProductDetailResponse, dependencies=[Depends(http_cache(s_maxage=60))])
+async def read_product_detail(id: int, db: AsyncSession = Depends(get_async_read_db)):
+    product = await db.scalar(
+        select(Product)
+        .options(selectinload(Product.images), selectinload(Product.variants))
+        .where(Product.id == id)
+    )
     
     if not product:
         raise HTTPException(status_code=404, detail="Sản phẩm không tồn tại")
     
-    related_products = db.query(Product).filter(
-        Product.category_id == product.category_id,
-        Product.id != id
-    ).limit(4).all()
+    ranked_ids = await related_ids(db, id, 4)
+    if ranked_ids:
+        by_id = {card["id"]: card for card in await fetch_cards(db, card_select().where(Product.id.in_(ranked_ids)))}
+        related_products = [by_id[pid] for pid in ranked_ids if pid in by_id]
+    else:
+        # Chưa có danh sách tính sẵn (sản phẩm mới): tạm lấy cùng danh mục, lần sau sẽ có
+        related_products = await fetch_cards(db, card_select().where(
+            Product.category_id == product.category_id,
+            Product.id != id
+        ).limit(4))
 
     colors = [
         v.variant_value for v in product.variants 
@@ -99,13 +183,13 @@ def read_product_detail(id: int, db: Session = Depends(get_db)):
         if v.variant_type and v.variant_type.strip().lower() == "size"
     ]
 
-    return {
-        "product": product,
+    return json_response(_detail_adapter, {
+        "product": ProductResponse.model_validate(product),
         "related": related_products,
         "colors": colors,
         "storages": storages,
         "sizes": sizes
-    }
+    })
 
 # # POST /products: Thêm sản phẩm (Admin)
 # @router.post("/", response_model=ProductResponse)
@@ -10,6 +10,7 @@ from app.models.order_item import OrderItem
 from app.api.deps import get_current_user
 from app.api import deps
 from app.schemas.profile import DashboardResponse
+from app.core.product_cards import card_select, fetch_cards_sync
 
 router = APIRouter()
 
@@ -30,9 +31,13 @@ def get_dashboard_profile(
     ).count()
 
   
-    wishlist_items = db.query(Product).join(Favorite).filter(
-        Favorite.user_id == current_user.id
-    ).limit(4).all()
+    wishlist_items = fetch_cards_sync(
+        db,
+        card_select().join(Favorite, Favorite.product_id == Product.id)
+        .where(Favorite.user_id == current_user.id).limit(4)
+    )
+    for card in wishlist_items:
+        card["is_favorite"] = True
 
     recent_orders_raw = db.query(Order).options(
         joinedload(Order.items).joinedload(OrderItem.product)
@@ -0,0 +1,389 @@
+"""
+Caching helpers: TTLCache trong process và cache dùng chung (in-memory hoặc Redis)
+có tag và single-flight
+"""
+import asyncio
+import pickle
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """LRU có thời hạn, an toàn khi dùng từ nhiều thread"""
+
+    def __init__(self, maxsize: int, ttl_seconds: int):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# ---- shared cache (dùng chung giữa các worker khi cấu hình CACHE_URL) ----
+
+class CacheBackend(ABC):
+    """
+    get/set/delete và xóa theo tag. Giá trị None được coi là miss nên không cache được.
+    TTLCache ở trên vẫn dùng cho dữ liệu chỉ cần trong 1 process (user đăng nhập, sticky replica).
+    """
+
+    # True khi mỗi lệnh là 1 round-trip mạng: helper async sẽ gọi qua threadpool
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: int, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl_seconds: int) -> bool:
+        """Chỉ set khi key chưa có; True nếu set được (dùng làm lock giữa các process)"""
+        ...
+
+    @abstractmethod
+    def pop(self, key: str) -> Any:
+        """Đọc rồi xóa nguyên tử: chỉ 1 nơi nhận được giá trị (token dùng 1 lần)"""
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_tag(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """LRU có TTL trong process, mặc định khi không cấu hình CACHE_URL (1 worker, dev, test)"""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (hết hạn, value, tags)
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _pop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item is not None and item[0] <= time.monotonic():
+            self._pop(key)
+            return None
+        return item
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: int, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + ttl_seconds, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self._maxsize:
+                self._pop(next(iter(self._data)))
+
+    def add(self, key: str, value: Any, ttl_seconds: int) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (time.monotonic() + ttl_seconds, value, ())
+            return True
+
+    def pop(self, key: str) -> Any:
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return None
+            self._pop(key)
+            return item[1]
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def delete_tag(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis (hoặc server cùng giao thức: KeyDB, Valkey, ...). Giá trị được pickle, tag là 1 SET
+    chứa các key gắn tag đó. Cần gói `redis`; test có thể truyền client của fakeredis.
+    """
+
+    blocking = True
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "", client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_URL trỏ tới Redis nhưng chưa cài gói redis (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self._key(key))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: int, tags: Iterable[str] = ()) -> None:
+        pipe = self._client.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=max(int(ttl_seconds), 1))
+        for tag in tags:
+            # Set của tag sống lâu hơn mọi giá trị; key đã hết hạn còn trong set thì DEL cũng vô hại
+            pipe.sadd(self._tag_key(tag), self._key(key))
+            pipe.expire(self._tag_key(tag), settings.CACHE_TAG_TTL_SECONDS)
+        pipe.execute()
+
+    def add(self, key: str, value: Any, ttl_seconds: int) -> bool:
+        return bool(self._client.set(
+            self._key(key), pickle.dumps(value), ex=max(int(ttl_seconds), 1), nx=True
+        ))
+
+    def pop(self, key: str) -> Any:
+        # GET + DEL trong MULTI/EXEC (GETDEL cần Redis >= 6.2)
+        pipe = self._client.pipeline()
+        pipe.get(self._key(key))
+        pipe.delete(self._key(key))
+        raw, _ = pipe.execute()
+        return pickle.loads(raw) if raw is not None else None
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*(self._key(key) for key in keys))
+
+    def delete_tag(self, *tags: str) -> None:
+        for tag in tags:
+            members = self._client.smembers(self._tag_key(tag))
+            if members:
+                # SREM đúng các key vừa đọc (không DEL cả set) để key được gắn tag ngay lúc này không bị mất
+                pipe = self._client.pipeline()
+                pipe.delete(*members)
+                pipe.srem(self._tag_key(tag), *members)
+                pipe.execute()
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self._prefix}*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def _build_backend() -> CacheBackend:
+    url = settings.CACHE_URL
+    if not url or url.startswith("memory://"):
+        return MemoryBackend(maxsize=settings.CACHE_MAX_ENTRIES)
+    return RedisBackend(url, prefix=settings.CACHE_KEY_PREFIX)
+
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+def set_cache(backend: Optional[CacheBackend]) -> None:
+    """Thay backend (test với fakeredis); None = dựng lại từ settings ở lần dùng tiếp theo"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ---- single-flight: khi miss chỉ 1 nơi tính lại, các request khác chờ kết quả ----
+
+class _KeyedLocks:
+    """Lock theo key, tự dọn khi không còn ai giữ/chờ"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._locks: Dict[str, list] = {}  # key -> [lock, số người đang dùng]
+        self._guard = threading.Lock()
+
+    def acquire_ref(self, key: str):
+        with self._guard:
+            entry = self._locks.setdefault(key, [self._factory(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def release_ref(self, key: str) -> None:
+        with self._guard:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+
+_thread_locks = _KeyedLocks(threading.Lock)
+_async_locks = _KeyedLocks(asyncio.Lock)
+
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+@contextmanager
+def single_flight(key: str):
+    """
+    Bọc đoạn "miss -> tính -> set". Trong process dùng lock theo key; với backend dùng chung
+    thêm lock SET NX để các worker khác chờ (tối đa CACHE_LOCK_SECONDS) thay vì cùng tính.
+    Bên trong nên get lại 1 lần vì có thể nơi khác vừa tính xong.
+    """
+    cache = get_cache()
+    lock = _thread_locks.acquire_ref(key)
+    try:
+        with lock:
+            owned = True
+            if cache.blocking:
+                owned = cache.add(_lock_key(key), 1, settings.CACHE_LOCK_SECONDS)
+                deadline = time.monotonic() + settings.CACHE_LOCK_SECONDS
+                while not owned and time.monotonic() < deadline and cache.get(key) is None:
+                    time.sleep(0.05)
+                    owned = cache.add(_lock_key(key), 1, settings.CACHE_LOCK_SECONDS)
+            try:
+                yield
+            finally:
+                if owned and cache.blocking:
+                    cache.delete(_lock_key(key))
+    finally:
+        _thread_locks.release_ref(key)
+
+
+async def _call(cache: CacheBackend, fn: Callable, *args):
+    if cache.blocking:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+async def aget(key: str) -> Any:
+    cache = get_cache()
+    return await _call(cache, cache.get, key)
+
+
+async def aset(key: str, value: Any, ttl_seconds: int, tags: Iterable[str] = ()) -> None:
+    cache = get_cache()
+    await _call(cache, cache.set, key, value, ttl_seconds, tuple(tags))
+
+
+async def apop(key: str) -> Any:
+    cache = get_cache()
+    return await _call(cache, cache.pop, key)
+
+
+async def aget_or_set(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl_seconds: int,
+    tags: Iterable[str] = (),
+) -> Any:
+    """Bản async của "get, miss thì single_flight + loader + set" cho các route async"""
+    cache = get_cache()
+    value = await _call(cache, cache.get, key)
+    if value is not None:
+        return value
+
+    lock = _async_locks.acquire_ref(key)
+    try:
+        async with lock:
+            value = await _call(cache, cache.get, key)
+            if value is not None:
+                return value
+
+            owned = True
+            if cache.blocking:
+                owned = await _call(cache, cache.add, _lock_key(key), 1, settings.CACHE_LOCK_SECONDS)
+                deadline = time.monotonic() + settings.CACHE_LOCK_SECONDS
+                while not owned and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    value = await _call(cache, cache.get, key)
+                    if value is not None:
+                        return value
+                    owned = await _call(cache, cache.add, _lock_key(key), 1, settings.CACHE_LOCK_SECONDS)
+            try:
+                value = await loader()
+                if value is not None:
+                    await _call(cache, cache.set, key, value, ttl_seconds, tuple(tags))
+                return value
+            finally:
+                if owned and cache.blocking:
+                    await _call(cache, cache.delete, _lock_key(key))
+    finally:
+        _async_locks.release_ref(key)
@@ -0,0 +1,131 @@
+"""
+Atomic cart mutations: upsert theo (user_id, product_id) thay vì SELECT rồi UPDATE/INSERT
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.shipping import get_ghn_shipping_details
+from app.models.address import Address
+from app.models.cart_item import CartItem
+from app.models.product import Product
+
+_INSERTS = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _upsert(dialect: str, rows: List[dict], increment: bool):
+    stmt = _INSERTS[dialect](CartItem).values(rows)
+    if dialect in ("mysql", "mariadb"):
+        incoming = stmt.inserted.quantity
+        return stmt.on_duplicate_key_update(
+            quantity=CartItem.quantity + incoming if increment else incoming
+        )
+    incoming = stmt.excluded.quantity
+    return stmt.on_conflict_do_update(
+        index_elements=[CartItem.user_id, CartItem.product_id],
+        set_={"quantity": CartItem.quantity + incoming if increment else incoming},
+    )
+
+
+async def missing_products(db: AsyncSession, product_ids: Iterable[int]) -> List[int]:
+    wanted = set(product_ids)
+    if not wanted:
+        return []
+    found = set((await db.scalars(select(Product.id).where(Product.id.in_(wanted)))).all())
+    return sorted(wanted - found)
+
+
+async def add_lines(db: AsyncSession, user_id: int, lines: Dict[int, int]) -> None:
+    """quantity += n cho từng sản phẩm, chưa có dòng thì tạo (1 câu lệnh, caller commit)"""
+    rows = [{"user_id": user_id, "product_id": pid, "quantity": qty} for pid, qty in lines.items() if qty > 0]
+    if rows:
+        await db.execute(_upsert(db.get_bind().dialect.name, rows, increment=True))
+
+
+async def set_lines(db: AsyncSession, user_id: int, lines: Dict[int, int]) -> None:
+    """quantity = n cho từng sản phẩm, n = 0 thì xóa dòng"""
+    removed = [pid for pid, qty in lines.items() if qty <= 0]
+    if removed:
+        await db.execute(delete(CartItem).where(CartItem.user_id == user_id, CartItem.product_id.in_(removed)))
+
+    rows = [{"user_id": user_id, "product_id": pid, "quantity": qty} for pid, qty in lines.items() if qty > 0]
+    if rows:
+        await db.execute(_upsert(db.get_bind().dialect.name, rows, increment=False))
+
+
+async def replace_lines(db: AsyncSession, user_id: int, lines: Dict[int, int]) -> None:
+    """Giỏ hàng chỉ còn đúng các dòng được gửi lên"""
+    keep = [pid for pid, qty in lines.items() if qty > 0]
+    stmt = delete(CartItem).where(CartItem.user_id == user_id)
+    if keep:
+        stmt = stmt.where(CartItem.product_id.not_in(keep))
+    await db.execute(stmt)
+    await set_lines(db, user_id, {pid: lines[pid] for pid in keep})
+
+
+async def cart_summary(db: AsyncSession, user_id: int, address_id: Optional[int] = None) -> dict:
+    """
+    Dòng giỏ hàng kèm thành tiền, cờ còn hàng, tạm tính và phí ship ước tính
+    (cùng tham số với lúc tạo đơn nên dùng chung cache báo giá GHN).
+    """
+    line_total = (Product.price * CartItem.quantity).label("line_total")
+    rows = (await db.execute(
+        select(
+            CartItem.id, CartItem.product_id, CartItem.quantity,
+            Product.name, Product.price, Product.main_image, Product.stock, Product.is_active,
+            line_total,
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    )).all()
+
+    items = []
+    subtotal = Decimal(0)
+    for row in rows:
+        available = bool(row.is_active is not False and (row.stock or 0) >= row.quantity)
+        subtotal += Decimal(row.line_total or 0)
+        items.append({
+            "id": row.id,
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "name": row.name,
+            "price": row.price,
+            "image": row.main_image,
+            "stock": row.stock,
+            "line_total": row.line_total,
+            "in_stock": available,
+        })
+
+    address_query = select(Address.id, Address.district_id, Address.ward_code).where(Address.user_id == user_id)
+    if address_id is not None:
+        address_query = address_query.where(Address.id == address_id)
+    else:
+        address_query = address_query.order_by(Address.is_default.desc(), Address.id)
+    address = (await db.execute(address_query.limit(1))).first()
+
+    shipping = None
+    if items and address is not None:
+        # requests là I/O đồng bộ -> chạy trong threadpool, không chặn event loop
+        quote = await run_in_threadpool(
+            get_ghn_shipping_details, to_district_id=address.district_id, to_ward_code=address.ward_code
+        )
+        shipping = {"address_id": address.id, **quote}
+
+    return {
+        "items": items,
+        "total_quantity": sum(item["quantity"] for item in items),
+        "subtotal": subtotal,
+        "all_in_stock": all(item["in_stock"] for item in items),
+        "shipping": shipping,
+        "total": subtotal + Decimal(shipping["fee"]) if shipping else subtotal,
+    }
@@ -0,0 +1,105 @@
+"""
+Set-based checkout: lock, decrement stock and move the cart into an order in one transaction
+"""
+from decimal import Decimal
+from typing import Dict
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.core import related, stats
+from app.models.cart_item import CartItem
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+
+
+def _cart_quantities(db: Session, user_id: int) -> Dict[int, int]:
+    # cart_items đã unique theo (user_id, product_id), GROUP BY giữ lại cho dữ liệu cũ chưa migrate
+    rows = db.query(CartItem.product_id, func.sum(CartItem.quantity))\
+        .filter(CartItem.user_id == user_id)\
+        .group_by(CartItem.product_id).all()
+    return {product_id: int(quantity) for product_id, quantity in rows}
+
+
+def place_order(db: Session, user_id: int, address_id: int, ship_details: dict) -> Order:
+    """
+    Tạo đơn từ giỏ hàng với số câu lệnh cố định, không phụ thuộc số dòng trong giỏ:
+    1 SELECT ... FOR UPDATE theo thứ tự id (tránh deadlock giữa các checkout đồng thời),
+    1 UPDATE trừ kho có điều kiện, 1 INSERT nhiều dòng order_items, 1 UPDATE + 1 DELETE giỏ hàng.
+    """
+    quantities = _cart_quantities(db, user_id)
+    if not quantities:
+        raise HTTPException(status_code=400, detail="Giỏ hàng trống")
+
+    product_ids = sorted(quantities)
+    products = db.query(Product.id, Product.name, Product.price, Product.stock)\
+        .filter(Product.id.in_(product_ids))\
+        .order_by(Product.id)\
+        .with_for_update().all()
+    by_id = {p.id: p for p in products}
+
+    for product_id in product_ids:
+        product = by_id.get(product_id)
+        if not product or product.stock < quantities[product_id]:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"Sản phẩm {product.name if product else 'ID '+str(product_id)} không đủ hàng")
+
+    quantity_by_id = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids), Product.stock >= quantity_by_id)
+        .values(stock=Product.stock - quantity_by_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(product_ids):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Sản phẩm trong giỏ không đủ hàng")
+
+    total_amount_products = sum(
+        (Decimal(by_id[pid].price) * qty for pid, qty in quantities.items()), Decimal(0)
+    )
+
+    new_order = Order(
+        user_id=user_id,
+        address_id=address_id,
+        shipping_fee=ship_details["fee"],
+        total_amount=total_amount_products,
+        subtotal=total_amount_products + ship_details["fee"],
+        expected_delivery_date=ship_details["expected_delivery"],
+        delivery_deadline=ship_details["deadline"],
+        shipping_status="PENDING",
+        payment_status="PENDING"
+    )
+    db.add(new_order)
+    db.flush()
+
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": new_order.id,
+            "product_id": pid,
+            "quantity": qty,
+            "price_at_purchase": by_id[pid].price,
+            "selected_size": None,
+            "selected_color": None,
+        } for pid, qty in quantities.items()
+    ])
+    # Chỉ trừ đúng số lượng đã đặt của các dòng đã đọc: sản phẩm được thêm vào giỏ trong lúc
+    # checkout (dòng mới hoặc tăng số lượng) vẫn còn lại trong giỏ
+    ordered = (CartItem.user_id == user_id, CartItem.product_id.in_(product_ids))
+    db.execute(
+        update(CartItem)
+        .where(*ordered)
+        .values(quantity=CartItem.quantity - case(quantities, value=CartItem.product_id))
+        .execution_options(synchronize_session=False)
+    )
+    db.query(CartItem).filter(*ordered, CartItem.quantity <= 0).delete(synchronize_session=False)
+    stats.bump(db, stats.ORDERS)
+
+    db.commit()
+    # Đơn mới thay đổi số lần mua chung của các sản phẩm này và thứ hạng của chúng trong
+    # danh sách của các sản phẩm khác
+    related.schedule_refresh(product_ids, with_partners=True)
+    db.refresh(new_order)
+    return new_order
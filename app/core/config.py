@@ -5,13 +5,40 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your_secret_key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None # mặc định = số core
+    PASSWORD_HASH_MAX_PENDING: int = 32 # nhỏ hơn threadpool của Starlette (40) để 503 sớm thay vì làm nghẽn route sync
     DATABASE_URL: Optional[str] = None
+
+    # Connection pool (mỗi engine, mỗi process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # nhỏ hơn wait_timeout của MySQL
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None # MySQL chỉ áp dụng cho SELECT
+
+    # Read replica (danh sách URL phân tách bằng dấu phẩy, để trống = chỉ dùng primary)
+    DATABASE_REPLICA_URLS: Optional[str] = None
+    REPLICA_STICKY_SECONDS: int = 5 # đọc từ primary ngay sau khi client ghi
+    REPLICA_RETRY_SECONDS: int = 30 # bỏ qua replica lỗi trong khoảng này
     
     # SMTP Settings (Optional - chỉ cần khi dùng email)
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_FROM: Optional[str] = None # mặc định dùng SMTP_USER
+    SMTP_USE_TLS: bool = True # tắt khi dùng debug SMTP server local
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    SMTP_IDLE_SECONDS: int = 60 # đóng kết nối SMTP khi rảnh quá lâu
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_POLL_SECONDS: float = 5.0
+    MAIL_MAX_ATTEMPTS: int = 5
+    MAIL_RETRY_BASE_SECONDS: int = 30
+    MAIL_RETRY_MAX_SECONDS: int = 3600
     
     # Google OAuth Settings
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -30,6 +57,48 @@ class Settings(BaseSettings):
     GHN_TOKEN: Optional[str] = None
     GHN_SHOPID: Optional[str] = None
     GHN_FEE_URL: str = "https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/fee"
+    GHN_API_BASE: str = "https://dev-online-gateway.ghn.vn/shiip/public-api"
+    GHN_TIMEOUT_SECONDS: float = 5.0
+    GHN_POOL_SIZE: int = 10
+    GHN_SERVICES_TTL_SECONDS: int = 3600
+    SHIPPING_QUOTE_TTL_SECONDS: int = 600
+    SHIPPING_WEIGHT_BUCKET_GRAMS: int = 500
+    GHN_MASTER_DATA_RELOAD_SECONDS: int = 3600
+    GHN_MASTER_DATA_MAX_AGE_SECONDS: int = 86400
+
+    # Product search index
+    SEARCH_INDEX_TTL_SECONDS: int = 300
+    SEARCH_MAX_RESULTS: int = 1000
+    PRODUCT_COUNT_CACHE_SECONDS: int = 30
+
+    # Related products
+    RELATED_PRODUCTS_SIZE: int = 8 # số sản phẩm lưu sẵn cho mỗi sản phẩm
+    RELATED_PRODUCTS_TTL_SECONDS: int = 86400 # quá hạn thì tính lại ở nền
+    RELATED_CANDIDATES: int = 50
+
+    # Shared cache (để trống = LRU trong process; nhiều worker: redis://host:6379/0)
+    CACHE_URL: Optional[str] = None
+    CACHE_KEY_PREFIX: str = "cnm:"
+    CACHE_MAX_ENTRIES: int = 10000 # chỉ áp dụng cho backend in-memory
+    CACHE_LOCK_SECONDS: int = 10 # thời gian chờ tối đa khi worker khác đang tính cùng key
+    CACHE_TAG_TTL_SECONDS: int = 86400
+
+    # HTTP cache (ETag) cho catalog công khai
+    CATALOG_VERSION_TTL_SECONDS: int = 300 # số bán/đánh giá thay đổi không qua admin chậm nhất chừng này
+
+    # Home page cache
+    HOME_CACHE_TTL_SECONDS: int = 60
+
+    # Realtime notifications (SSE)
+    NOTIFICATION_BROKER: str = "app.core.realtime:LocalBroker" # nhiều worker: thay bằng broker dùng chung
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 100
+    SSE_TICKET_TTL_SECONDS: int = 30
+
+    # Authenticated user cache
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+
     # Tự động tìm file .env ở thư mục gốc
     model_config = SettingsConfigDict(
         env_file=".env",
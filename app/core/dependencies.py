@@ -8,6 +8,7 @@ from typing import Optional
 from app.db.session import get_db
 from app.models.user import User
 from app.core.security import get_current_user_from_token, decode_access_token
+from app.core.user_cache import get_user_by_email
 
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ def get_current_user(
         HTTPException: If user not found
     """
     logger.info(f"Looking up user with email: {email}")
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_by_email(db, email)
     
     if not user:
         logger.error(f"User not found: {email}")
@@ -1,25 +1,16 @@
 import random
 import string
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from app.core.config import settings
+from sqlalchemy.orm import Session
+from app.core.mail_queue import enqueue_email
 
 def generate_verification_code(length: int = 6) -> str:
     """Sinh mã xác thực gồm các chữ số (ví dụ: 123456)"""
     return ''.join(random.choices(string.digits, k=length))
 
-def send_verification_email(email: str, code: str) -> bool:
-    """Gửi email chứa mã xác thực"""
-    try:
-        # Tạo email
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_USER
-        msg['To'] = email
-        msg['Subject'] = 'Xác thực tài khoản - Mã xác nhận'
-        
-        # Nội dung email
-        body = f"""
+def queue_verification_email(db: Session, email: str, code: str) -> None:
+    """Đưa email chứa mã xác thực vào hàng đợi (gửi khi transaction commit)"""
+    # Nội dung email
+    body = f"""
         <html>
             <body>
                 <h2>Chào mừng bạn đến với hệ thống!</h2>
@@ -30,32 +21,14 @@ def send_verification_email(email: str, code: str) -> bool:
             </body>
         </html>
         """
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        # Kết nối và gửi
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        return True
-    except Exception as e:
-        print(f"Lỗi gửi email: {e}")
-        return False
+    enqueue_email(db, email, 'Xác thực tài khoản - Mã xác nhận', body)
 
 
-def send_password_reset_email(email: str, token: str) -> bool:
-    """Gửi email chứa link/token đặt lại mật khẩu"""
-    try:
-        reset_link = f"http://localhost:3000/reset-password?token={token}"
+def queue_password_reset_email(db: Session, email: str, token: str) -> None:
+    """Đưa email chứa link/token đặt lại mật khẩu vào hàng đợi"""
+    reset_link = f"http://localhost:3000/reset-password?token={token}"
 
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_USER
-        msg['To'] = email
-        msg['Subject'] = 'Đặt lại mật khẩu'
-
-        body = f"""
+    body = f"""
         <html>
             <body>
                 <h2>Yêu cầu đặt lại mật khẩu</h2>
@@ -66,15 +39,4 @@ def send_password_reset_email(email: str, token: str) -> bool:
             </body>
         </html>
         """
-
-        msg.attach(MIMEText(body, 'html'))
-
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-
-        return True
-    except Exception as e:
-        print(f"Lỗi gửi email reset mật khẩu: {e}")
-        return False
+    enqueue_email(db, email, 'Đặt lại mật khẩu', body)
@@ -0,0 +1,120 @@
+"""
+Local mirror of GHN province/district/ward master data
+
+Dữ liệu được lưu ở bảng ghn_master_data, nạp vào bộ nhớ lúc khởi động và
+chỉ gọi GHN khi thiếu dữ liệu hoặc khi admin yêu cầu làm mới:
+
+    python -m app.core.ghn_master_data
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.shipping import ghn_get
+from app.models.ghn_master_data import GhnMasterData
+
+PROVINCE = "province"
+DISTRICT = "district"
+WARD = "ward"
+
+logger = logging.getLogger(__name__)
+
+_SOURCES = {
+    PROVINCE: ("/master-data/province", None),
+    DISTRICT: ("/master-data/district", "province_id"),
+    WARD: ("/master-data/ward", "district_id"),
+}
+
+
+class Entry(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _make_entry(payload: str) -> Entry:
+    body = payload.encode("utf-8")
+    return Entry(body=body, etag='"' + hashlib.sha1(body).hexdigest() + '"')
+
+
+class MasterDataStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int], Entry] = {}
+        self._loaded_at: Optional[float] = None
+
+    def load(self, db: Session) -> None:
+        """Nạp toàn bộ bảng vào bộ nhớ (gọi lúc startup và định kỳ để đồng bộ giữa các worker)"""
+        rows = db.query(GhnMasterData.kind, GhnMasterData.parent_id, GhnMasterData.payload).all()
+        entries = {(kind, parent_id): _make_entry(payload) for kind, parent_id, payload in rows}
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def _fetch(self, kind: str, parent_id: int) -> str:
+        path, param = _SOURCES[kind]
+        try:
+            res = ghn_get(path, {param: parent_id} if param else None)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Lỗi kết nối GHN: {str(e)}")
+
+        # Chỉ lưu khi GHN trả lời thành công, lỗi (token sai, mã cha không tồn tại...)
+        # không được ghi thành danh sách rỗng
+        data = res.get("data")
+        if res.get("code") != 200 or not isinstance(data, list):
+            status_code = 400 if res.get("code") == 400 else 502
+            raise HTTPException(status_code=status_code, detail=f"GHN lỗi: {res.get('message') or res.get('code')}")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def _store(self, db: Session, kind: str, parent_id: int, payload: str) -> Entry:
+        db.merge(GhnMasterData(kind=kind, parent_id=parent_id, payload=payload))
+        db.commit()
+        entry = _make_entry(payload)
+        with self._lock:
+            self._entries[(kind, parent_id)] = entry
+        return entry
+
+    def get(self, db: Session, kind: str, parent_id: int = 0) -> Entry:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.GHN_MASTER_DATA_RELOAD_SECONDS:
+            self.load(db)
+
+        entry = self._entries.get((kind, parent_id))
+        if entry is None:
+            entry = self._store(db, kind, parent_id, self._fetch(kind, parent_id))
+        return entry
+
+    def refresh(self, db: Session) -> int:
+        """Lấy lại từ GHN danh sách tỉnh và mọi huyện/xã đã từng được hỏi tới"""
+        self.load(db)
+        keys = set(self._entries) | {(PROVINCE, 0)}
+        refreshed = 0
+        for kind, parent_id in sorted(keys):
+            try:
+                payload = self._fetch(kind, parent_id)
+            except HTTPException as e:
+                # Giữ bản cũ, lần làm mới sau thử lại
+                logger.warning(f"Không làm mới được {kind}/{parent_id}: {e.detail}")
+                continue
+            self._store(db, kind, parent_id, payload)
+            refreshed += 1
+        return refreshed
+
+
+master_data = MasterDataStore()
+
+
+if __name__ == "__main__":
+    import app.db.base  # noqa: F401  (đăng ký toàn bộ model)
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Đã làm mới {master_data.refresh(db)} danh sách GHN")
+    finally:
+        db.close()
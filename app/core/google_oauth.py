@@ -1,33 +1,20 @@
 from authlib.integrations.starlette_client import OAuth
 from app.core.config import settings
-import time
-from threading import Lock
+from app.core.cache import aget, aset
 
-# Simple in-memory state store untuk OAuth
-oauth_state_store = {}
-state_store_lock = Lock()
+OAUTH_STATE_TTL_SECONDS = 600  # 10 phút
 
-def save_oauth_state(state: str, data: dict):
-    """Simpan OAuth state dengan expiry 10 menit"""
-    with state_store_lock:
-        oauth_state_store[state] = {
-            'data': data,
-            'exp': time.time() + 600  # 10 minutes
-        }
 
-def get_oauth_state(state: str):
-    """Ambil OAuth state (tidak xóa - để có thể verify lagi)"""
-    with state_store_lock:
-        if state in oauth_state_store:
-            item = oauth_state_store[state]
-            # Check expiry
-            if item['exp'] > time.time():
-                return item['data']
-            else:
-                # Expired - xóa
-                del oauth_state_store[state]
-                return None
-    return None
+def _state_key(state: str) -> str:
+    return f"oauth:state:{state}"
+
+async def save_oauth_state(state: str, data: dict):
+    """Lưu OAuth state vào cache dùng chung để callback về worker nào cũng đọc được"""
+    await aset(_state_key(state), data, OAUTH_STATE_TTL_SECONDS)
+
+async def get_oauth_state(state: str):
+    """Lấy OAuth state (không xóa - để có thể verify lại); None nếu không có hoặc đã hết hạn"""
+    return await aget(_state_key(state))
 
 oauth = OAuth()
 
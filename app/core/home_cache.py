@@ -0,0 +1,85 @@
+"""
+Precomputed payload for the home page
+"""
+import orjson
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import aget_or_set, get_cache
+from app.core.config import settings
+from app.core.responses import dumps
+from app.core.product_cards import card_select, fetch_cards_sync
+from app.db.replicas import run_with_read_db
+from app.models.category import Category
+from app.models.product import Product
+
+
+def build_home_payload(db: Session) -> dict:
+    """Dữ liệu trang chủ cho khách (chưa có is_favorite theo user)"""
+    categories_query = db.query(
+        Category, 
+        func.count(Product.id).label("total")
+    ).outerjoin(Product, Category.id == Product.category_id)\
+     .filter(Category.is_active == True)\
+     .group_by(Category.id).limit(8).all()
+
+    categories_data = [
+        {
+            "id": cat.id,
+            "name": cat.name,
+            "img": cat.image_url,
+            "product_count": f"{total/1000:.1f}k+" if total >= 1000 else f"{total}+"
+        } for cat, total in categories_query
+    ]
+
+    best_sellers_data = fetch_cards_sync(
+        db, card_select().order_by(Product.sold_count.desc()).limit(20)
+    )
+
+    return jsonable_encoder({
+        "featured_categories": categories_data,
+        "best_sellers": best_sellers_data
+    })
+
+
+def serialize_payload(payload: dict) -> bytes:
+    # Cùng encoder với ORJSONResponse mặc định của app
+    return dumps(payload)
+
+
+class HomePayloadCache:
+    """
+    Payload trang chủ đã serialize sẵn, lưu trong cache dùng chung nên mọi worker dùng chung
+    1 bản và invalidate() có hiệu lực ở tất cả. Hết hạn sau HOME_CACHE_TTL_SECONDS hoặc khi
+    sản phẩm/danh mục/đơn hàng thay đổi. Bản dict giải mã từ body được giữ lại trong process.
+    """
+
+    KEY = "home:payload"
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._decoded: Optional[Tuple[bytes, dict]] = None
+
+    async def _build(self) -> bytes:
+        # Truy vấn + serialize chạy trong threadpool với session sync riêng, không chặn event loop
+        return await run_in_threadpool(lambda: serialize_payload(run_with_read_db(build_home_payload)))
+
+    async def get(self) -> Tuple[dict, bytes]:
+        # Chỉ 1 request build lại, các request khác chờ và dùng kết quả
+        body = await aget_or_set(self.KEY, self._build, self._ttl)
+
+        decoded = self._decoded
+        if decoded is None or decoded[0] != body:
+            decoded = (body, orjson.loads(body))
+            self._decoded = decoded
+        return decoded[1], body
+
+    def invalidate(self) -> None:
+        get_cache().delete(self.KEY)
+
+
+home_cache = HomePayloadCache(ttl_seconds=settings.HOME_CACHE_TTL_SECONDS)
@@ -0,0 +1,103 @@
+"""
+HTTP caching (ETag / 304) cho các endpoint catalog công khai
+
+Route khai báo chính sách bằng dependencies=[Depends(http_cache(...))]. ETag = phiên bản
+catalog + URL, phiên bản được đổi mỗi khi admin ghi sản phẩm/danh mục (bump_catalog_version).
+Request mang If-None-Match trùng ETag được trả 304 trước khi route chạy, không chạm DB.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Callable
+
+from fastapi import HTTPException, Request
+
+from app.core.cache import aget_or_set, get_cache
+from app.core.config import settings
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int = 0 # trình duyệt: 0 = luôn hỏi lại (rẻ vì thường là 304)
+    s_maxage: int = 60 # CDN / proxy dùng chung
+    personalized: bool = False # nội dung khác nhau theo user đăng nhập (is_favorite, ...)
+
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, s-maxage={self.s_maxage}"
+
+
+def _new_version() -> str:
+    return f"{int(time.time() * 1000):x}"
+
+
+def bump_catalog_version() -> None:
+    """Gọi sau khi commit thay đổi sản phẩm/danh mục: mọi ETag catalog cũ hết hiệu lực"""
+    get_cache().set(CATALOG_VERSION_KEY, _new_version(), settings.CATALOG_VERSION_TTL_SECONDS)
+
+
+async def catalog_version() -> str:
+    """
+    Hết TTL thì sinh phiên bản mới: số bán, đánh giá... thay đổi không qua admin
+    cũng chỉ bị cache lâu nhất CATALOG_VERSION_TTL_SECONDS
+    """
+    async def create() -> str:
+        return _new_version()
+    return await aget_or_set(CATALOG_VERSION_KEY, create, settings.CATALOG_VERSION_TTL_SECONDS)
+
+
+def _etag(version: str, request: Request) -> str:
+    url = request.url.path + "?" + "&".join(sorted(request.url.query.split("&")))
+    digest = hashlib.sha1(url.encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def http_cache(max_age: int = 0, s_maxage: int = 60, personalized: bool = False) -> Callable:
+    """
+    Chính sách cache cho 1 route GET: dependencies=[Depends(http_cache(...))].
+    Đặt ở dependencies của route để chạy trước các dependency khác (chưa lấy session DB).
+    """
+    policy = CachePolicy(max_age=max_age, s_maxage=s_maxage, personalized=personalized)
+
+    async def check(request: Request) -> None:
+        if policy.personalized and request.headers.get("Authorization"):
+            # Bản riêng của user: không để CDN giữ, không dùng ETag chung
+            request.state.http_cache_headers = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+            return
+
+        version = await catalog_version()
+        headers = {
+            "ETag": _etag(version, request),
+            "Cache-Control": policy.cache_control(),
+            "Last-Modified": formatdate(int(version, 16) / 1000, usegmt=True),
+        }
+        if policy.personalized:
+            headers["Vary"] = "Authorization"
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and _matches(if_none_match, headers["ETag"]):
+            raise HTTPException(status_code=304, headers=headers)
+        request.state.http_cache_headers = headers
+
+    return check
+
+
+async def catalog_http_cache(request: Request, call_next):
+    """Middleware: gắn header do http_cache() tính vào response 200 (kể cả route trả thẳng Response)"""
+    response = await call_next(request)
+    headers = getattr(request.state, "http_cache_headers", None)
+    if headers and response.status_code == 200:
+        headers = dict(headers)
+        vary = response.headers.get("Vary")
+        if vary and "Vary" in headers:
+            # Giữ Vary: Origin do CORSMiddleware thêm
+            headers["Vary"] = f"{vary}, {headers['Vary']}"
+        response.headers.update(headers)
+    return response
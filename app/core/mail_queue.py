@@ -0,0 +1,191 @@
+"""
+Outbound mail queue
+
+Route chỉ ghi thư vào bảng outbound_emails trong transaction của nó; một worker
+nền giữ sẵn kết nối SMTP đã đăng nhập, gửi theo lô và thử lại với backoff.
+"""
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.outbound_email import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+PENDING = "PENDING"
+SENT = "SENT"
+FAILED = "FAILED"
+
+# Thời gian 1 worker "giữ" thư đang gửi; worker chết giữa chừng thì thư tự được gửi lại
+CLAIM_LEASE_SECONDS = 120
+
+_wakeup = threading.Event()
+
+
+def enqueue_email(db: Session, to_address: str, subject: str, html_body: str) -> None:
+    """Thêm thư vào hàng đợi, worker được đánh thức ngay khi transaction commit"""
+    db.add(OutboundEmail(
+        to_address=to_address,
+        subject=subject,
+        html_body=html_body,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    event.listen(db, "after_commit", lambda session: _wakeup.set(), once=True)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = settings.MAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=min(seconds, settings.MAIL_RETRY_MAX_SECONDS))
+
+
+class MailWorker(threading.Thread):
+    def __init__(self):
+        super().__init__(name="mail-worker", daemon=True)
+        self._stop_event = threading.Event()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used: Optional[datetime] = None
+
+    # ---- SMTP connection ----
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close()
+
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
+            server.starttls()
+        if settings.SMTP_USER:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        self._smtp = server
+        return server
+
+    def _close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _send(self, mail: OutboundEmail) -> None:
+        msg = MIMEMultipart()
+        msg['From'] = settings.SMTP_FROM or settings.SMTP_USER
+        msg['To'] = mail.to_address
+        msg['Subject'] = mail.subject
+        msg.attach(MIMEText(mail.html_body, 'html'))
+
+        reused = self._smtp is not None
+        try:
+            self._connection().send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Chỉ lỗi mất kết nối (server đóng kết nối đang giữ) mới mở lại và gửi lại 1 lần.
+            # SMTPException khác (vd. SMTPDataError) là server đã trả lời -> không gửi lại
+            # ở đây để tránh trùng thư, để lần retry của hàng đợi xử lý.
+            self._close()
+            if not reused:
+                raise
+            self._connection().send_message(msg)
+        self._last_used = datetime.utcnow()
+
+    # ---- queue processing ----
+
+    def _claim_batch(self, db: Session):
+        now = datetime.utcnow()
+        candidates = db.query(OutboundEmail.id).filter(
+            OutboundEmail.status == PENDING,
+            OutboundEmail.next_attempt_at <= now
+        ).order_by(OutboundEmail.id).limit(settings.MAIL_BATCH_SIZE).all()
+
+        claimed = []
+        lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        for (mail_id,) in candidates:
+            updated = db.query(OutboundEmail).filter(
+                OutboundEmail.id == mail_id,
+                OutboundEmail.status == PENDING,
+                OutboundEmail.next_attempt_at <= now
+            ).update({OutboundEmail.next_attempt_at: lease_until}, synchronize_session=False)
+            if updated:
+                claimed.append(mail_id)
+        db.commit()
+
+        if not claimed:
+            return []
+        return db.query(OutboundEmail).filter(OutboundEmail.id.in_(claimed)).order_by(OutboundEmail.id).all()
+
+    def process_batch(self) -> int:
+        """Gửi 1 lô thư đến hạn, trả về số thư đã xử lý"""
+        db = SessionLocal()
+        try:
+            batch = self._claim_batch(db)
+            for mail in batch:
+                try:
+                    self._send(mail)
+                    mail.status = SENT
+                    mail.sent_at = datetime.utcnow()
+                    mail.last_error = None
+                except Exception as e:
+                    mail.attempts += 1
+                    mail.last_error = str(e)
+                    if mail.attempts >= settings.MAIL_MAX_ATTEMPTS:
+                        mail.status = FAILED
+                        logger.error(f"Giving up on email {mail.id} to {mail.to_address}: {e}")
+                    else:
+                        mail.next_attempt_at = datetime.utcnow() + _retry_delay(mail.attempts)
+                        logger.warning(f"Email {mail.id} failed (attempt {mail.attempts}): {e}")
+                db.commit()
+            return len(batch)
+        finally:
+            db.close()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                if self.process_batch():
+                    continue
+            except Exception as e:
+                logger.error(f"Mail worker error: {e}", exc_info=True)
+
+            idle = self._last_used and datetime.utcnow() - self._last_used > timedelta(seconds=settings.SMTP_IDLE_SECONDS)
+            if idle:
+                self._close()
+            _wakeup.wait(timeout=settings.MAIL_POLL_SECONDS)
+            _wakeup.clear()
+        self._close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        _wakeup.set()
+
+
+_worker: Optional[MailWorker] = None
+
+
+def start_mail_worker() -> None:
+    global _worker
+    if _worker is None:
+        _worker = MailWorker()
+        _worker.start()
+
+
+def stop_mail_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker.join(timeout=5)
+        _worker = None
@@ -0,0 +1,62 @@
+"""
+Tạo thông báo cho user và giữ bộ đếm chưa đọc (notification_counters) khớp với bảng notifications
+"""
+from sqlalchemy import case, event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import realtime
+from app.core.stats import increment_row
+from app.models.notification import Notification, NotificationCounter
+from app.schemas.notification import NotificationResponse
+
+# session.info: các sự kiện push chờ transaction commit
+_PENDING_PUSH = "pending_notification_push"
+
+
+def notify(db: Session, user_id: int, title: str, content: str, type: str) -> Notification:
+    """Thêm thông báo + tăng bộ đếm trong transaction của nghiệp vụ (caller commit), đẩy realtime sau commit"""
+    notification = Notification(user_id=user_id, title=title, content=content, type=type, is_read=False)
+    db.add(notification)
+    increment_row(db, NotificationCounter, {"user_id": user_id}, {"unread": 1})
+
+    db.flush()
+    db.info.setdefault(_PENDING_PUSH, []).append((user_id, push_event(notification)))
+    return notification
+
+
+def push_event(notification: Notification) -> dict:
+    return {
+        "event": "notification",
+        "id": notification.id,
+        "data": NotificationResponse.model_validate(notification).model_dump(mode="json"),
+    }
+
+
+@event.listens_for(Session, "after_commit")
+def _push_after_commit(session: Session) -> None:
+    for user_id, payload in session.info.pop(_PENDING_PUSH, ()):
+        realtime.publish(user_id, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_PUSH, None)
+
+
+async def unread_count(db: AsyncSession, user_id: int) -> int:
+    counter = await db.get(NotificationCounter, user_id)
+    return counter.unread if counter else 0
+
+
+async def decrement_unread(db: AsyncSession, user_id: int, amount: int) -> None:
+    if amount <= 0:
+        return
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=case(
+            (NotificationCounter.unread > amount, NotificationCounter.unread - amount),
+            else_=0,
+        ))
+    )
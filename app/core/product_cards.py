@@ -0,0 +1,79 @@
+"""
+Product card projection shared by listing, home, favorites, related products and wishlist
+
+Chỉ SELECT các cột mà card hiển thị (không dựng ORM object), ảnh lấy bằng 1 query IN
+cho cả trang, và serialize thẳng ra JSON qua TypeAdapter dựng sẵn.
+"""
+from collections import defaultdict
+from typing import Any, Collection, Dict, List, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.responses import RawJSONResponse
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.schemas.product import ProductResponse
+
+CARD_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.original_price,
+    Product.discount_percent,
+    Product.category_id,
+    Product.brand_id,
+    Product.main_image,
+    Product.is_new,
+    Product.rating_avg,
+    Product.reviews_count,
+    Product.sold_count,
+)
+_CARD_KEYS = tuple(column.key for column in CARD_COLUMNS)
+
+card_list_adapter = TypeAdapter(List[ProductResponse])
+
+
+def card_select():
+    """SELECT các cột của card, thêm join/where/order_by như query Product thường"""
+    return select(*CARD_COLUMNS)
+
+
+def _images_select(product_ids: Collection[int]):
+    return select(ProductImage.product_id, ProductImage.id, ProductImage.image_url)\
+        .where(ProductImage.product_id.in_(product_ids))\
+        .order_by(ProductImage.id)
+
+
+def _assemble(rows: Sequence, image_rows: Sequence, favorite_ids: Collection[int]) -> List[Dict[str, Any]]:
+    images = defaultdict(list)
+    for product_id, image_id, image_url in image_rows:
+        images[product_id].append({"id": image_id, "image_url": image_url})
+
+    cards = []
+    for row in rows:
+        card = dict(zip(_CARD_KEYS, row))
+        card["is_favorite"] = card["id"] in favorite_ids
+        card["images"] = images.get(card["id"], [])
+        cards.append(card)
+    return cards
+
+
+async def fetch_cards(db: AsyncSession, stmt, favorite_ids: Collection[int] = ()) -> List[Dict[str, Any]]:
+    rows = (await db.execute(stmt)).all()
+    image_rows = (await db.execute(_images_select([row[0] for row in rows]))).all() if rows else []
+    return _assemble(rows, image_rows, favorite_ids)
+
+
+def fetch_cards_sync(db: Session, stmt, favorite_ids: Collection[int] = ()) -> List[Dict[str, Any]]:
+    rows = db.execute(stmt).all()
+    image_rows = db.execute(_images_select([row[0] for row in rows])).all() if rows else []
+    return _assemble(rows, image_rows, favorite_ids)
+
+
+def json_response(adapter: TypeAdapter, data) -> RawJSONResponse:
+    """Validate + serialize trong 1 lượt của pydantic-core, bỏ qua bước encode lại của FastAPI"""
+    return RawJSONResponse(adapter.dump_json(adapter.validate_python(data)))
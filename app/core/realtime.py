@@ -0,0 +1,161 @@
+"""
+Đẩy thông báo mới tới client đang mở kết nối SSE
+
+Route ghi thông báo -> broker.publish() sau khi commit -> broker chuyển sự kiện tới
+hub của mọi worker -> hub đưa vào queue của từng kết nối SSE của user đó.
+"""
+import asyncio
+import importlib
+import logging
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set
+
+from app.core.cache import apop, aset
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, dict], None]
+
+
+class NotificationBroker(ABC):
+    """
+    Kênh phát sự kiện giữa các worker process. Bản cài đặt khác (Redis pub/sub, Postgres
+    LISTEN/NOTIFY, ...) chỉ cần publish ra kênh chung và gọi `deliver` khi nhận được sự kiện.
+    Chọn qua NOTIFICATION_BROKER = "module.path:ClassName".
+    """
+
+    @abstractmethod
+    def start(self, deliver: Deliver) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, user_id: int, event: dict) -> None:
+        ...
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalBroker(NotificationBroker):
+    """Chỉ trong 1 process: publish gọi thẳng deliver (dùng khi chạy 1 worker và khi test)"""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, user_id: int, event: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, event)
+
+    def stop(self) -> None:
+        self._deliver = None
+
+
+class NotificationHub:
+    """Các queue SSE đang mở theo user, sống trên event loop của app"""
+
+    def __init__(self, queue_size: int):
+        self._queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self._loop = loop
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def deliver(self, user_id: int, event: dict) -> None:
+        """Gọi được từ mọi thread (route sync chạy trong threadpool, thread của broker)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._lock:
+            if user_id not in self._subscribers:
+                return
+        loop.call_soon_threadsafe(self._fan_out, user_id, event)
+
+    def _fan_out(self, user_id: int, event: dict) -> None:
+        with self._lock:
+            queues = list(self._subscribers.get(user_id, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Client đọc không kịp: bỏ phần tồn đọng, client tự tải lại danh sách
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"event": "resync"})
+
+
+hub = NotificationHub(queue_size=settings.SSE_QUEUE_SIZE)
+_broker: Optional[NotificationBroker] = None
+
+
+def _load_broker(path: str) -> NotificationBroker:
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def start_realtime(loop: asyncio.AbstractEventLoop) -> None:
+    global _broker
+    hub.bind(loop)
+    _broker = _load_broker(settings.NOTIFICATION_BROKER)
+    _broker.start(hub.deliver)
+
+
+def stop_realtime() -> None:
+    global _broker
+    if _broker is not None:
+        _broker.stop()
+        _broker = None
+    hub.bind(None)
+
+
+def publish(user_id: int, event: dict) -> None:
+    if _broker is None:
+        return
+    try:
+        _broker.publish(user_id, event)
+    except Exception:
+        # Push chỉ là tối ưu, client vẫn lấy được qua GET /notifications
+        logger.exception("Không đẩy được thông báo realtime")
+
+
+# ---- Vé mở SSE: EventSource không gửi được header, không để JWT nằm trên URL (log, history) ----
+
+def _ticket_key(ticket: str) -> str:
+    return f"sse:ticket:{ticket}"
+
+
+async def issue_stream_ticket(email: str) -> str:
+    """Vé ngẫu nhiên, sống SSE_TICKET_TTL_SECONDS, lưu trong cache dùng chung để worker nào cũng đổi được"""
+    ticket = secrets.token_urlsafe(32)
+    await aset(_ticket_key(ticket), email, settings.SSE_TICKET_TTL_SECONDS)
+    return ticket
+
+
+async def redeem_stream_ticket(ticket: str) -> Optional[str]:
+    """Email của vé, None nếu sai/hết hạn/đã dùng (vé bị xóa ngay khi đổi)"""
+    return await apop(_ticket_key(ticket))
@@ -0,0 +1,193 @@
+"""
+Precomputed related products for the product detail page
+
+Mỗi sản phẩm có sẵn danh sách RELATED_PRODUCTS_SIZE sản phẩm liên quan trong bảng
+product_related, xếp hạng theo số đơn mua chung (order_items) kết hợp cùng danh mục
+và giá gần nhau. Danh sách được tính lại ở nền cho các sản phẩm vừa có đơn mới,
+vừa được admin sửa, hoặc đã quá RELATED_PRODUCTS_TTL_SECONDS.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, desc, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.related_product import RelatedProduct
+
+logger = logging.getLogger(__name__)
+
+CO_PURCHASE_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+PRICE_WEIGHT = 1.0
+
+
+def _co_purchased(db: Session, product_id: int, limit: int) -> Dict[int, int]:
+    """{product_id khác: số đơn có mua chung}"""
+    mine = aliased(OrderItem)
+    other = aliased(OrderItem)
+    orders = func.count(func.distinct(other.order_id)).label("orders")
+    rows = db.execute(
+        select(other.product_id, orders)
+        .select_from(mine)
+        .join(other, and_(other.order_id == mine.order_id, other.product_id != mine.product_id))
+        .where(mine.product_id == product_id)
+        .group_by(other.product_id)
+        .order_by(desc(orders))
+        .limit(limit)
+    ).all()
+    return {pid: count for pid, count in rows}
+
+
+def _price_neighbours(db: Session, product, limit: int) -> List[int]:
+    """Sản phẩm cùng danh mục có giá gần nhất (một nửa cao hơn, một nửa thấp hơn)"""
+    if product.category_id is None:
+        return []
+    base = select(Product.id).where(
+        Product.category_id == product.category_id,
+        Product.id != product.id,
+        Product.is_active == True,
+    )
+    half = max(limit // 2, 1)
+    above = db.scalars(base.where(Product.price >= product.price).order_by(Product.price.asc()).limit(half)).all()
+    below = db.scalars(base.where(Product.price < product.price).order_by(Product.price.desc()).limit(half)).all()
+    return list(above) + list(below)
+
+
+def compute_related(db: Session, product_id: int) -> List[Tuple[int, float]]:
+    product = db.execute(
+        select(Product.id, Product.category_id, Product.price).where(Product.id == product_id)
+    ).first()
+    if product is None:
+        return []
+
+    co_purchased = _co_purchased(db, product_id, settings.RELATED_CANDIDATES)
+    candidate_ids = set(co_purchased) | set(_price_neighbours(db, product, settings.RELATED_CANDIDATES))
+    if not candidate_ids:
+        return []
+
+    candidates = db.execute(
+        select(Product.id, Product.category_id, Product.price)
+        .where(Product.id.in_(candidate_ids), Product.is_active == True)
+    ).all()
+
+    price = float(product.price or 0)
+    scored = []
+    for cand in candidates:
+        cand_price = float(cand.price or 0)
+        top = max(price, cand_price)
+        proximity = 1 - min(abs(cand_price - price) / top, 1) if top > 0 else 1
+        score = (
+            CO_PURCHASE_WEIGHT * math.log1p(co_purchased.get(cand.id, 0))
+            + CATEGORY_WEIGHT * (cand.category_id == product.category_id)
+            + PRICE_WEIGHT * proximity
+        )
+        scored.append((cand.id, round(score, 6)))
+
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:settings.RELATED_PRODUCTS_SIZE]
+
+
+def store_related(db: Session, product_id: int, ranked: List[Tuple[int, float]]) -> None:
+    """Ghi đè danh sách của 1 sản phẩm (caller commit)"""
+    db.execute(delete(RelatedProduct).where(RelatedProduct.product_id == product_id))
+    now = datetime.utcnow()
+    # Danh sách rỗng vẫn ghi 1 dòng related_id NULL để không bị tính lại ở mỗi lượt xem
+    rows = ranked or [(None, 0.0)]
+    db.execute(insert(RelatedProduct), [
+        {"product_id": product_id, "rank": rank, "related_id": related_id, "score": score, "computed_at": now}
+        for rank, (related_id, score) in enumerate(rows)
+    ])
+
+
+def refresh_related(db: Session, product_ids: Iterable[int]) -> int:
+    count = 0
+    for product_id in product_ids:
+        store_related(db, product_id, compute_related(db, product_id))
+        count += 1
+    db.commit()
+    return count
+
+
+# ---- background refresh ----
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related-products")
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _with_partners(db: Session, product_ids: List[int]) -> List[int]:
+    """Thêm các sản phẩm đang có các id này trong danh sách liên quan của mình"""
+    partners = db.scalars(
+        select(RelatedProduct.product_id).where(RelatedProduct.related_id.in_(product_ids)).distinct()
+    ).all()
+    return sorted(set(product_ids) | set(partners))
+
+
+def _run_refresh(product_ids: List[int], with_partners: bool) -> None:
+    with _pending_lock:
+        _pending.difference_update(product_ids)
+    db = SessionLocal()
+    try:
+        if with_partners:
+            product_ids = _with_partners(db, product_ids)
+        for start in range(0, len(product_ids), 200):
+            refresh_related(db, product_ids[start:start + 200])
+    except Exception:
+        db.rollback()
+        logger.exception(f"Không tính được sản phẩm liên quan cho {product_ids}")
+    finally:
+        db.close()
+
+
+def schedule_refresh(product_ids: Iterable[int], with_partners: bool = False) -> None:
+    """
+    Tính lại ở thread nền (dùng primary), bỏ qua id đang chờ sẵn trong hàng đợi.
+    with_partners: tính lại cả các sản phẩm đang xếp các id này trong danh sách của mình
+    (đơn mới, admin đổi giá/danh mục/ẩn sản phẩm)
+    """
+    with _pending_lock:
+        new_ids = [pid for pid in set(product_ids) if pid not in _pending]
+        _pending.update(new_ids)
+    if new_ids:
+        _executor.submit(_run_refresh, sorted(new_ids), with_partners)
+
+
+async def related_ids(db: AsyncSession, product_id: int, limit: int) -> Optional[List[int]]:
+    """Danh sách id đã xếp hạng ([] nếu đã tính mà không có); None nếu chưa tính (đồng thời lên lịch tính ở nền)"""
+    rows = (await db.execute(
+        select(RelatedProduct.related_id, RelatedProduct.computed_at)
+        .where(RelatedProduct.product_id == product_id)
+        .order_by(RelatedProduct.rank)
+        .limit(limit)
+    )).all()
+    if not rows:
+        schedule_refresh([product_id])
+        return None
+
+    oldest = min((computed_at for _, computed_at in rows if computed_at), default=None)
+    if oldest is None or oldest < datetime.utcnow() - timedelta(seconds=settings.RELATED_PRODUCTS_TTL_SECONDS):
+        schedule_refresh([product_id])
+    return [related_id for related_id, _ in rows if related_id is not None]
+
+
+if __name__ == "__main__":
+    import app.db.base  # noqa: F401  (đăng ký toàn bộ model)
+
+    db = SessionLocal()
+    try:
+        ids = db.scalars(select(Product.id).order_by(Product.id)).all()
+        total = 0
+        for start in range(0, len(ids), 200):
+            total += refresh_related(db, ids[start:start + 200])
+        print(f"Đã tính sản phẩm liên quan cho {total} sản phẩm")
+    finally:
+        db.close()
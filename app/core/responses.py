@@ -0,0 +1,37 @@
+"""
+JSON responses dùng orjson
+
+ORJSONResponse là response mặc định của app (route trả dict/list). Route có response_model
+vẫn đi đường dump_json của pydantic như trước. RawJSONResponse gửi thẳng bytes đã serialize
+sẵn (cache trang chủ, dữ liệu GHN, card sản phẩm) mà không validate/encode lại.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import decimal_encoder, jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # orjson tự xử lý datetime/date/UUID/Enum/dataclass; Decimal giữ cách encode cũ của FastAPI
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Body là bytes JSON đã có sẵn"""
+    media_type = "application/json"
@@ -0,0 +1,123 @@
+"""
+Daily revenue rollup used by the admin dashboard
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core import stats
+from app.models.daily_revenue import DailyRevenue
+from app.models.order import Order, PaymentStatus
+from app.models.order_item import OrderItem
+
+def _is_paid(status) -> bool:
+    return status is not None and status == PaymentStatus.PAID
+
+
+def _order_day(order: Order) -> date:
+    return order.created_at.date() if order.created_at else date.today()
+
+
+def _apply_payment_change(db: Session, order: Order, old_status, new_status) -> None:
+    was_paid, is_paid = _is_paid(old_status), _is_paid(new_status)
+    if was_paid == is_paid:
+        return
+
+    sign = 1 if is_paid else -1
+    amount = sign * Decimal(order.total_amount or 0)
+    stats.increment_row(
+        db, DailyRevenue, {"day": _order_day(order)}, {"amount": amount, "paid_orders": sign}
+    )
+    stats.bump(db, stats.REVENUE, amount)
+
+
+def set_payment_status(db: Session, order: Order, new_status) -> bool:
+    """
+    Đổi payment_status bằng UPDATE ... WHERE payment_status = <trạng thái vừa đọc>, rollup
+    doanh thu chỉ được cộng/trừ khi chính UPDATE này đổi được dòng: 2 request xác nhận cùng
+    1 đơn không cộng doanh thu 2 lần. False nếu không đổi gì (trùng trạng thái hoặc request
+    khác đã đổi trước). Caller commit.
+    """
+    new_status = PaymentStatus(new_status)
+    old_status = order.payment_status
+    if old_status == new_status:
+        return False
+
+    changed = db.query(Order).filter(Order.id == order.id, Order.payment_status == old_status)\
+        .update({Order.payment_status: new_status}, synchronize_session=False)
+    if changed != 1:
+        return False
+
+    set_committed_value(order, "payment_status", new_status)
+    _apply_payment_change(db, order, old_status, new_status)
+    return True
+
+
+def remove_order(db: Session, order: Order) -> bool:
+    """Xóa đơn (DELETE có điều kiện như trên), trừ doanh thu + số đơn; False nếu đơn vừa bị xóa/đổi"""
+    old_status = order.payment_status
+    deleted = db.query(Order).filter(Order.id == order.id, Order.payment_status == old_status)\
+        .delete(synchronize_session=False)
+    if deleted != 1:
+        return False
+
+    db.query(OrderItem).filter(OrderItem.order_id == order.id).delete(synchronize_session=False)
+    db.expunge(order)
+    _apply_payment_change(db, order, old_status, None)
+    stats.bump(db, stats.ORDERS, -1)
+    return True
+
+
+def rebuild_daily_revenue(db: Session) -> None:
+    """
+    Tính lại toàn bộ rollup bằng 1 câu GROUP BY theo ngày. Dữ liệu cũ đã được nạp ở
+    migration 0001a; chạy tay khi cần đối soát: python -m app.core.revenue
+    """
+    rows = db.query(
+        func.date(Order.created_at).label("day"),
+        func.sum(Order.total_amount),
+        func.count(Order.id),
+    ).filter(Order.payment_status == PaymentStatus.PAID)\
+     .group_by(func.date(Order.created_at)).all()
+
+    db.query(DailyRevenue).delete(synchronize_session=False)
+    for day, amount, count in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        db.add(DailyRevenue(day=day, amount=amount or 0, paid_orders=count))
+    db.commit()
+
+
+def revenue_chart(db: Session, days: int, today: Optional[date] = None) -> List[Dict]:
+    """Doanh thu `days` ngày gần nhất, ngày không có đơn được điền 0"""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+
+    rows = db.query(DailyRevenue.day, DailyRevenue.amount)\
+        .filter(DailyRevenue.day >= start, DailyRevenue.day <= today).all()
+    by_day = {day: amount for day, amount in rows}
+
+    chart = []
+    for i in range(days):
+        target_date = start + timedelta(days=i)
+        chart.append({
+            "date": target_date.strftime("%d/%m"),
+            "amount": float(by_day.get(target_date) or 0)
+        })
+    return chart
+
+
+if __name__ == "__main__":
+    import app.db.base  # noqa: F401  (đăng ký toàn bộ model)
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild_daily_revenue(db)
+        print("Đã dựng lại bảng daily_revenue từ bảng orders")
+    finally:
+        db.close()
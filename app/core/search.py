@@ -0,0 +1,182 @@
+"""
+In-memory inverted index for product search
+"""
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.category import Category
+from app.models.product import Product
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Trọng số theo trường: khớp ở tên quan trọng hơn khớp ở mô tả
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 1.5,
+    "description": 1.0,
+}
+PREFIX_MATCH_FACTOR = 0.5
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Bỏ dấu tiếng Việt và chuyển về chữ thường ("Điện Thoại" -> "dien thoai")"""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+class ProductSearchIndex:
+    """
+    Inverted index (term -> {product_id: weighted tf}) trên name/description/category name.
+
+    Index được build lazy ở lần search đầu tiên, cập nhật khi admin ghi sản phẩm
+    và build lại định kỳ (SEARCH_INDEX_TTL_SECONDS) để các worker khác không bị lệch quá lâu.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._lock = threading.RLock()
+        self._ttl = ttl_seconds
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+        self._built_at: Optional[float] = None
+
+    # ---- build / maintenance ----
+
+    def _is_fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self._ttl
+
+    def ensure_built(self, db: Session) -> None:
+        if not self._is_fresh():
+            self.rebuild(db)
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.query(
+            Product.id, Product.name, Product.description, Category.name
+        ).outerjoin(Category, Product.category_id == Category.id).all()
+
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_terms = {}
+            for product_id, name, description, category_name in rows:
+                self._add(product_id, name, description, category_name)
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+            self._built_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Đánh dấu index cũ, lần search sau sẽ build lại (vd: đổi tên danh mục)"""
+        with self._lock:
+            self._built_at = None
+
+    def refresh_product(self, db: Session, product_id: int) -> None:
+        """Cập nhật lại 1 sản phẩm sau khi admin tạo/sửa"""
+        if self._built_at is None:
+            return
+
+        row = db.query(
+            Product.id, Product.name, Product.description, Category.name
+        ).outerjoin(Category, Product.category_id == Category.id)\
+         .filter(Product.id == product_id).first()
+
+        with self._lock:
+            self._remove(product_id)
+            if row:
+                self._add(*row)
+            self._vocab_dirty = True
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            self._remove(product_id)
+            self._vocab_dirty = True
+
+    def _add(self, product_id: int, name, description, category_name) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in (("name", name), ("description", description), ("category", category_name)):
+            for term in tokenize(text):
+                weights[term] += FIELD_WEIGHTS[field]
+
+        for term, weight in weights.items():
+            self._postings[term][product_id] = weight
+        self._doc_terms[product_id] = set(weights)
+
+    def _remove(self, product_id: int) -> None:
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+
+    # ---- query ----
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect.bisect_left(self._vocab, prefix)
+        terms = []
+        for term in self._vocab[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, db: Session, text: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Trả về danh sách product_id đã xếp hạng (TF-IDF theo trọng số trường).
+        Mọi từ khóa phải khớp; từ cuối cùng được khớp theo tiền tố để hỗ trợ gõ dở.
+        """
+        self.ensure_built(db)
+        terms = tokenize(text)
+        if not terms:
+            return []
+
+        with self._lock:
+            total_docs = max(len(self._doc_terms), 1)
+            scores: Optional[Dict[int, float]] = None
+
+            for i, term in enumerate(terms):
+                candidates = {term: 1.0} if term in self._postings else {}
+                if i == len(terms) - 1:
+                    for expanded in self._expand_prefix(term):
+                        candidates.setdefault(expanded, PREFIX_MATCH_FACTOR)
+
+                term_scores: Dict[int, float] = defaultdict(float)
+                for candidate, factor in candidates.items():
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for product_id, weight in postings.items():
+                        term_scores[product_id] = max(term_scores[product_id], weight * idf * factor)
+
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {pid: s + term_scores[pid] for pid, s in scores.items() if pid in term_scores}
+                if not scores:
+                    return []
+
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], -pid))
+        limit = limit or settings.SEARCH_MAX_RESULTS
+        return ranked[:limit]
+
+
+product_search_index = ProductSearchIndex(ttl_seconds=settings.SEARCH_INDEX_TTL_SECONDS)
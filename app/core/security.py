@@ -1,5 +1,9 @@
+import asyncio
 import hashlib
+import multiprocessing
+import os
 import bcrypt
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status, Header
@@ -21,9 +25,9 @@ def _prepare_password(password: str) -> bytes:
         return hashlib.sha256(password_bytes).hexdigest().encode('utf-8')
     return password_bytes
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = None) -> str:
     prepared = _prepare_password(password)
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(prepared, salt)
     return hashed.decode('utf-8')
 
@@ -31,6 +35,60 @@ def verify_password(password: str, hashed_password: str) -> bool:
     prepared = _prepare_password(password)
     return bcrypt.checkpw(prepared, hashed_password.encode('utf-8'))
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Hash được tạo với cost khác BCRYPT_ROUNDS hiện tại ($2b$<cost>$...)"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+# ---- Pool process riêng cho bcrypt: không chiếm thread của threadpool, không tranh GIL ----
+
+_hash_executor = None
+_hash_pending = 0
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+def shutdown_password_hasher() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    Gọi từ route async: event loop chỉ await future, bcrypt chạy ở process riêng.
+    Không gọi trong lúc đang giữ transaction/connection DB.
+    """
+    global _hash_pending
+    # Chỉ chạy trên event loop nên đếm không cần lock
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        logger.warning("Password hashing queue is full")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hệ thống đang bận, vui lòng thử lại sau",
+            headers={"Retry-After": "1"},
+        )
+
+    _hash_pending += 1
+    try:
+        return await asyncio.wrap_future(_get_hash_executor().submit(fn, *args))
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password, settings.BCRYPT_ROUNDS)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, password, hashed_password)
+
 def create_access_token(subject: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {
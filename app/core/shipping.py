@@ -1,19 +1,127 @@
-import requests
-from app.core.config import settings
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
+
 import requests
+from requests.adapters import HTTPAdapter
 
-def get_ghn_shipping_details(to_district_id: int, to_ward_code: str, weight: int = 500):
-    SHOP_ID = int(settings.GHN_SHOPID)
-    FROM_DISTRICT_ID = 1526 
-    FROM_WARD_CODE = "910347"
-    
-    headers = {
+from app.core.cache import get_cache, single_flight
+from app.core.config import settings
+
+FROM_DISTRICT_ID = 1526 
+FROM_WARD_CODE = "910347"
+DEFAULT_SERVICE_ID = 53321
+
+
+# Connection pool dùng chung cho mọi lần gọi GHN (không mở kết nối mới mỗi request)
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=settings.GHN_POOL_SIZE))
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=settings.GHN_POOL_SIZE))
+_executor = ThreadPoolExecutor(max_workers=settings.GHN_POOL_SIZE, thread_name_prefix="ghn")
+
+# Dịch vụ và báo giá GHN nằm trong cache dùng chung (mọi worker dùng lại của nhau)
+SHIPPING_CACHE_TAG = "shipping"
+
+
+def _headers() -> dict:
+    return {
         "Token": settings.GHN_TOKEN,
-        "ShopId": str(SHOP_ID),
+        "ShopId": str(settings.GHN_SHOPID),
         "Content-Type": "application/json"
     }
 
+
+def _post(path: str, payload: dict) -> dict:
+    res = _session.post(
+        f"{settings.GHN_API_BASE}{path}",
+        json=payload,
+        headers=_headers(),
+        timeout=settings.GHN_TIMEOUT_SECONDS,
+    )
+    return res.json()
+
+
+def ghn_get(path: str, params: Optional[dict] = None) -> dict:
+    res = _session.get(
+        f"{settings.GHN_API_BASE}{path}",
+        params=params,
+        headers={"Token": settings.GHN_TOKEN},
+        timeout=settings.GHN_TIMEOUT_SECONDS,
+    )
+    return res.json()
+
+
+def _weight_bucket(weight: int) -> int:
+    """Làm tròn lên theo bậc cân nặng để các đơn gần giống nhau dùng chung báo giá"""
+    step = settings.SHIPPING_WEIGHT_BUCKET_GRAMS
+    return max(1, math.ceil(weight / step)) * step
+
+
+def get_service_id(to_district_id: int) -> int:
+    """Dịch vụ GHN khả dụng cho quận/huyện đích (cache theo quận)"""
+    cache_key = f"ghn:service:{to_district_id}"
+    service_id = get_cache().get(cache_key)
+    if service_id is not None:
+        return service_id
+
+    services = _post("/v2/shipping-order/available-services", {
+        "shop_id": int(settings.GHN_SHOPID),
+        "from_district": FROM_DISTRICT_ID,
+        "to_district": int(to_district_id)
+    }).get("data", [])
+
+    if services and isinstance(services, list):
+        service_id = services[0]["service_id"]
+        get_cache().set(cache_key, service_id, settings.GHN_SERVICES_TTL_SECONDS, tags=(SHIPPING_CACHE_TAG,))
+        return service_id
+    return DEFAULT_SERVICE_ID
+
+
+def _fetch_quote(cache_key: str, to_district_id: int, to_ward_code: str, weight: int, service_id: int) -> dict:
+    # Phí và thời gian giao không phụ thuộc nhau -> gọi song song
+    fee_future = _executor.submit(_post, "/v2/shipping-order/fee", {
+        "from_district_id": FROM_DISTRICT_ID,
+        "from_ward_code": FROM_WARD_CODE,
+        "service_id": service_id,
+        "to_district_id": to_district_id,
+        "to_ward_code": to_ward_code,
+        "weight": weight, "height": 10, "length": 10, "width": 10, "insurance_value": 0
+    })
+    lt_future = _executor.submit(_post, "/v2/shipping-order/leadtime", {
+        "from_district_id": FROM_DISTRICT_ID, "from_ward_code": FROM_WARD_CODE,
+        "to_district_id": to_district_id, "to_ward_code": to_ward_code,
+        "service_id": service_id
+    })
+
+    fee_data = fee_future.result()
+    lt_data = lt_future.result()
+
+    fee = fee_data["data"]["total"] if fee_data.get("code") == 200 else 35000
+    
+    expected_delivery = "3-7 ngày"
+    deadline = None
+    
+    if lt_data.get("code") == 200:
+        ts = lt_data["data"]["leadtime"]
+        dt = datetime.fromtimestamp(ts)
+        expected_delivery = dt.strftime("%d/%m/%Y")
+        deadline = (dt + timedelta(days=1)).strftime("%d/%m/%Y")
+
+    result = {
+        "fee": fee,
+        "expected_delivery": expected_delivery,
+        "deadline": deadline
+    }
+    # Chỉ cache khi GHN trả lời đầy đủ, lỗi tạm thời không bị giữ lại
+    if fee_data.get("code") == 200 and lt_data.get("code") == 200:
+        get_cache().set(
+            cache_key, dict(result), settings.SHIPPING_QUOTE_TTL_SECONDS, tags=(SHIPPING_CACHE_TAG,)
+        )
+    return result
+
+
+def get_ghn_shipping_details(to_district_id: int, to_ward_code: str, weight: int = 500):
     default_res = {
         "fee": 35000,
         "expected_delivery": "3-7 ngày",
@@ -21,50 +129,22 @@ def get_ghn_shipping_details(to_district_id: int, to_ward_code: str, weight: int
     }
 
     try:
-        service_url = "https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/available-services"
-        res_service = requests.post(service_url, json={
-            "shop_id": SHOP_ID,
-            "from_district": FROM_DISTRICT_ID,
-            "to_district": int(to_district_id)
-        }, headers=headers)
-        
-        services = res_service.json().get("data", [])
-        service_id = services[0]["service_id"] if (services and isinstance(services, list)) else 53321
-
-        fee_res = requests.post("https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/fee", json={
-            "from_district_id": FROM_DISTRICT_ID,
-            "from_ward_code": FROM_WARD_CODE,
-            "service_id": service_id,
-            "to_district_id": int(to_district_id),
-            "to_ward_code": str(to_ward_code),
-            "weight": weight, "height": 10, "length": 10, "width": 10, "insurance_value": 0
-        }, headers=headers)
-        
-        lt_res = requests.post("https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/leadtime", json={
-            "from_district_id": FROM_DISTRICT_ID, "from_ward_code": FROM_WARD_CODE,
-            "to_district_id": int(to_district_id), "to_ward_code": str(to_ward_code),
-            "service_id": service_id
-        }, headers=headers)
+        to_district_id = int(to_district_id)
+        to_ward_code = str(to_ward_code)
+        weight = _weight_bucket(weight)
+        service_id = get_service_id(to_district_id)
 
-        fee_data = fee_res.json()
-        lt_data = lt_res.json()
+        cache_key = f"ghn:quote:{to_district_id}:{to_ward_code}:{weight}:{service_id}"
+        cached = get_cache().get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-        fee = fee_data["data"]["total"] if fee_data.get("code") == 200 else 35000
-        
-        expected_delivery = "3-7 ngày"
-        deadline = None
-        
-        if lt_data.get("code") == 200:
-            ts = lt_data["data"]["leadtime"]
-            dt = datetime.fromtimestamp(ts)
-            expected_delivery = dt.strftime("%d/%m/%Y")
-            deadline = (dt + timedelta(days=1)).strftime("%d/%m/%Y")
-
-        return {
-            "fee": fee,
-            "expected_delivery": expected_delivery,
-            "deadline": deadline
-        }
+        # Nhiều giỏ hàng cùng hỏi 1 tuyến lúc cache trống -> chỉ 1 lần gọi GHN
+        with single_flight(cache_key):
+            cached = get_cache().get(cache_key)
+            if cached is not None:
+                return dict(cached)
+            return _fetch_quote(cache_key, to_district_id, to_ward_code, weight, service_id)
 
     except Exception as e:
         print(f"GHN Global Error: {e}")
@@ -73,26 +153,8 @@ def get_ghn_shipping_details(to_district_id: int, to_ward_code: str, weight: int
 
     
 def create_ghn_shipping_order(order, address):
-    url = "https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/create"
-    SHOP_ID = int(settings.GHN_SHOPID)
-    FROM_DISTRICT_ID = 1526
-    
-    headers = {
-        "Token": settings.GHN_TOKEN,
-        "ShopId": str(SHOP_ID),
-        "Content-Type": "application/json"
-    }
-
     try:
-        service_url = "https://dev-online-gateway.ghn.vn/shiip/public-api/v2/shipping-order/available-services"
-        res_service = requests.post(service_url, json={
-            "shop_id": SHOP_ID,
-            "from_district": FROM_DISTRICT_ID,
-            "to_district": int(address.district_id)
-        }, headers=headers)
-        
-        services = res_service.json().get("data", [])
-        service_id = services[0]["service_id"] if (services and isinstance(services, list)) else 53321
+        service_id = get_service_id(int(address.district_id))
 
         test_district_id = 1442 
         test_ward_code = "20101"
@@ -128,8 +190,7 @@ def create_ghn_shipping_order(order, address):
         }
         print(f"GHN addreess: {address.district_id, address.street_details, address.ward_code}")
 
-        response = requests.post(url, json=payload, headers=headers)
-        data = response.json()
+        data = _post("/v2/shipping-order/create", payload)
         
         if data.get("code") == 200:
             return data["data"]["order_code"]
@@ -0,0 +1,102 @@
+"""
+Running counters and daily deltas for the admin KPI tiles
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, PaymentStatus
+from app.models.product import Product
+from app.models.stats import DailyStat, StatCounter
+from app.models.user import User
+
+ORDERS = "orders"
+REVENUE = "revenue"
+USERS = "users"
+PRODUCTS = "products"
+
+# Dùng 1 lần khi counter chưa có trong DB (lần đầu chạy)
+_INITIALIZERS = {
+    ORDERS: lambda db: db.query(func.count(Order.id)).scalar(),
+    REVENUE: lambda db: db.query(func.sum(Order.total_amount))
+        .filter(Order.payment_status == PaymentStatus.PAID).scalar(),
+    USERS: lambda db: db.query(func.count(User.id)).scalar(),
+    PRODUCTS: lambda db: db.query(func.count(Product.id)).scalar(),
+}
+
+
+def increment_row(db: Session, model, key: dict, increments: dict) -> None:
+    """
+    UPDATE ... SET col = col + delta theo khóa chính, chưa có dòng thì INSERT.
+    Chạy trong transaction của request, không commit.
+    """
+    filters = [getattr(model, k) == v for k, v in key.items()]
+    values = {getattr(model, col): getattr(model, col) + delta for col, delta in increments.items()}
+
+    if db.query(model).filter(*filters).update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **increments))
+    except IntegrityError:
+        # Request khác vừa INSERT cùng khóa -> cộng dồn
+        db.query(model).filter(*filters).update(values, synchronize_session=False)
+
+
+def bump(db: Session, metric: str, delta=1, day: Optional[date] = None) -> None:
+    """
+    Ghi nhận biến động của chỉ số, gọi trước db.commit() của nghiệp vụ. Với thay đổi trạng thái
+    chỉ gọi sau khi UPDATE/DELETE có điều kiện của chính request này đổi được dòng (xem
+    revenue.set_payment_status), không dựa vào so sánh giá trị đã đọc trước đó.
+    """
+    delta = Decimal(delta)
+    db.query(StatCounter).filter(StatCounter.name == metric).update(
+        {StatCounter.value: StatCounter.value + delta}, synchronize_session=False
+    )
+    increment_row(db, DailyStat, {"day": day or date.today(), "metric": metric}, {"delta": delta})
+
+
+def _load_counters(db: Session) -> Dict[str, Decimal]:
+    counters = {
+        name: value for name, value in
+        db.query(StatCounter.name, StatCounter.value).filter(StatCounter.name.in_(_INITIALIZERS)).all()
+    }
+    missing = [name for name in _INITIALIZERS if name not in counters]
+    if missing:
+        for name in missing:
+            counters[name] = Decimal(_INITIALIZERS[name](db) or 0)
+            db.add(StatCounter(name=name, value=counters[name]))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    return counters
+
+
+def snapshot(db: Session, days: int) -> Dict[str, Tuple[Decimal, Decimal]]:
+    """
+    Trả về {metric: (tổng hiện tại, biến động trong `days` ngày gần nhất)}
+    chỉ với 2 lần đọc theo khóa.
+    """
+    counters = _load_counters(db)
+    start = date.today() - timedelta(days=days - 1)
+    deltas = dict(
+        db.query(DailyStat.metric, func.sum(DailyStat.delta))
+        .filter(DailyStat.day >= start, DailyStat.metric.in_(_INITIALIZERS))
+        .group_by(DailyStat.metric).all()
+    )
+    return {name: (counters[name], Decimal(deltas.get(name) or 0)) for name in _INITIALIZERS}
+
+
+def format_trend(total: Decimal, delta: Decimal) -> str:
+    """% tăng trưởng của tổng so với đầu kỳ"""
+    previous = total - delta
+    if not delta:
+        return "0%"
+    if previous <= 0:
+        return "+100%"
+    return f"{float(delta / previous * 100):+.1f}%"
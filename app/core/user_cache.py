@@ -0,0 +1,61 @@
+"""
+Short-lived cache of authenticated users keyed by token subject (email)
+"""
+from typing import Optional
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
+
+def _snapshot(user: User) -> dict:
+    return {key: getattr(user, key) for key in _COLUMNS}
+
+
+def _detached(data: dict) -> User:
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+
+def _restore(db: Session, data: dict) -> User:
+    # Gắn lại vào session của request mà không SELECT, relationship (profile...) vẫn lazy load được
+    return db.merge(_detached(data), load=False)
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Thay cho SELECT users WHERE email = ? ở các dependency xác thực"""
+    data = _cache.get(email)
+    if data is not None:
+        return _restore(db, data)
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        _cache.set(email, _snapshot(user))
+    return user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """Bản async cho các route dùng AsyncSession"""
+    data = _cache.get(email)
+    if data is not None:
+        return await db.merge(_detached(data), load=False)
+
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+    if user is not None:
+        _cache.set(email, _snapshot(user))
+    return user
+
+
+def invalidate_user(*emails: Optional[str]) -> None:
+    """Gọi sau khi ghi vào user (đổi quyền, khóa, xóa, đổi mật khẩu, ...)"""
+    for email in emails:
+        if email:
+            _cache.delete(email)
@@ -1,4 +1,4 @@
 from app.models import order
 from app.db.base_class import Base
-from app.models import user, profile, address, category, brand, product, product_image, product_variant, order_item, favorite, notification
+from app.models import user, profile, address, category, brand, product, product_image, product_variant, order_item, favorite, notification, daily_revenue, stats, ghn_master_data, outbound_email, related_product
 from app.models.cart_item import CartItem
@@ -0,0 +1,147 @@
+"""
+Telemetry cho connection pool: số kết nối đang mượn, thời gian chờ checkout, overflow, timeout
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Biên trên (ms) của các bucket histogram thời gian chờ; bucket cuối là +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.pool = None
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.timeouts = 0
+        self.invalidated = 0
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, elapsed_ms)] += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+        logger.warning(f"DB pool '{self.name}' hết kết nối: {self._status()}")
+
+    def _status(self) -> str:
+        return self.pool.status() if self.pool is not None else "n/a"
+
+    def snapshot(self) -> Dict:
+        pool = self.pool
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip(WAIT_BUCKETS_MS + ("+Inf",), self.wait_buckets):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            return {
+                "pool_size": pool.size() if pool is not None else None,
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "idle": pool.checkedin() if pool is not None else None,
+                "overflow": pool.overflow() if pool is not None else None,
+                "checkouts_total": self.checkouts,
+                "connects_total": self.connects,
+                "overflow_connects_total": self.overflow_connects,
+                "timeouts_total": self.timeouts,
+                "invalidated_total": self.invalidated,
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum_ms, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": histogram,
+                },
+            }
+
+
+_registry: Dict[str, PoolMetrics] = {}
+
+
+def _timed_do_get(pool, do_get):
+    metrics = _registry.get(pool._metrics_name)
+    started = time.perf_counter()
+    try:
+        conn = do_get()
+    except exc.TimeoutError:
+        if metrics is not None:
+            metrics.observe_timeout()
+        raise
+    if metrics is not None:
+        metrics.observe_wait((time.perf_counter() - started) * 1000)
+    return conn
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool đo thời gian chờ lấy kết nối (bao gồm cả lúc mở kết nối mới)"""
+    _metrics_name = None
+
+    def _do_get(self):
+        return _timed_do_get(self, super()._do_get)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    _metrics_name = None
+
+    def _do_get(self):
+        return _timed_do_get(self, super()._do_get)
+
+
+def instrument(engine, name: str) -> PoolMetrics:
+    """Gắn listener đếm checkout/checkin/overflow lên pool của engine (sync engine)"""
+    metrics = PoolMetrics(name)
+    pool = engine.pool
+    metrics.pool = pool
+    pool._metrics_name = name
+    _registry[name] = metrics
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_conn, record):
+        with metrics._lock:
+            metrics.connects += 1
+            if getattr(pool, "overflow", None) and pool.overflow() > 0:
+                metrics.overflow_connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        with metrics._lock:
+            metrics.checkouts += 1
+            metrics.checked_out += 1
+            metrics.max_checked_out = max(metrics.max_checked_out, metrics.checked_out)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        with metrics._lock:
+            metrics.checked_out = max(metrics.checked_out - 1, 0)
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        with metrics._lock:
+            metrics.invalidated += 1
+
+    return metrics
+
+
+def pool_snapshot() -> Dict[str, Dict]:
+    return {name: metrics.snapshot() for name, metrics in _registry.items()}
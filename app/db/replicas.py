@@ -0,0 +1,167 @@
+"""
+Định tuyến truy vấn đọc sang read replica (round-robin, tự bỏ qua replica lỗi)
+"""
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, TypeVar
+
+from fastapi import Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument
+from app.db.session import AsyncSessionLocal, SessionLocal, _apply_statement_timeout, _pool_options, to_async_url
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Cookie đánh dấu client vừa ghi, các request đọc tiếp theo đi vào primary (dùng được giữa nhiều worker)
+STICKY_COOKIE = "db_primary_until"
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+_CONNECT_ERRORS = (exc.DBAPIError, exc.TimeoutError, OSError)
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.down_until = 0.0
+
+        self.engine = create_engine(url, **_pool_options(url, InstrumentedQueuePool))
+        _apply_statement_timeout(self.engine)
+        instrument(self.engine, name)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        async_url = to_async_url(url)
+        self.async_engine = create_async_engine(async_url, **_pool_options(async_url, InstrumentedAsyncQueuePool))
+        _apply_statement_timeout(self.async_engine.sync_engine)
+        instrument(self.async_engine.sync_engine, f"{name}_async")
+        self.AsyncSession = async_sessionmaker(
+            bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+
+
+class ReplicaSet:
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica_{i}", url) for i, url in enumerate(urls)]
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[Replica]:
+        """Các replica còn khỏe, bắt đầu từ replica kế tiếp theo vòng round-robin"""
+        if not self.replicas:
+            return []
+        with self._lock:
+            start = next(self._counter) % len(self.replicas)
+        now = time.monotonic()
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [r for r in ordered if r.down_until <= now]
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        replica.down_until = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        logger.warning(f"Read replica {replica.name} lỗi, tạm bỏ qua {settings.REPLICA_RETRY_SECONDS}s: {error}")
+
+
+def _replica_urls() -> List[str]:
+    raw = settings.DATABASE_REPLICA_URLS or ""
+    return [url.strip() for url in raw.split(",") if url.strip()]
+
+
+replica_set = ReplicaSet(_replica_urls())
+
+# Token vừa ghi -> đọc từ primary trong REPLICA_STICKY_SECONDS (trong 1 worker)
+_recent_writers = TTLCache(maxsize=100000, ttl_seconds=settings.REPLICA_STICKY_SECONDS)
+
+
+def _writer_key(request: Request) -> Optional[str]:
+    auth = request.headers.get("Authorization")
+    if not auth:
+        return None
+    return hashlib.sha1(auth.encode()).hexdigest()
+
+
+def _is_sticky(request: Request) -> bool:
+    key = _writer_key(request)
+    if key is not None and _recent_writers.get(key):
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_write(request: Request, response) -> None:
+    """Gọi sau mỗi request ghi thành công: cùng client sẽ đọc từ primary trong cửa sổ sticky"""
+    if not replica_set.replicas or request.method in _SAFE_METHODS or response.status_code >= 400:
+        return
+    key = _writer_key(request)
+    if key is not None:
+        _recent_writers.set(key, True)
+    response.set_cookie(
+        STICKY_COOKIE,
+        str(time.time() + settings.REPLICA_STICKY_SECONDS),
+        max_age=settings.REPLICA_STICKY_SECONDS,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def _open_read_session(sticky: bool = False):
+    if not sticky:
+        for replica in replica_set.candidates():
+            candidate = replica.Session()
+            try:
+                candidate.connection()
+                return candidate
+            except _CONNECT_ERRORS as e:
+                candidate.close()
+                replica_set.mark_down(replica, e)
+    return SessionLocal()
+
+
+def get_read_db(request: Request):
+    """Session đọc: replica nếu có và client không vừa ghi, ngược lại là primary"""
+    db = _open_read_session(_is_sticky(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def run_with_read_db(fn: Callable[[Session], T]) -> T:
+    """
+    Chạy fn với session đọc sync riêng (đóng khi xong). Dùng qua run_in_threadpool cho
+    các việc đọc nặng ở route async (build index tìm kiếm, payload trang chủ)
+    """
+    db = _open_read_session()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    db = None
+    if not _is_sticky(request):
+        for replica in replica_set.candidates():
+            candidate = replica.AsyncSession()
+            try:
+                await candidate.connection()
+                db = candidate
+                break
+            except _CONNECT_ERRORS as e:
+                await candidate.close()
+                replica_set.mark_down(replica, e)
+    if db is None:
+        db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
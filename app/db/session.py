@@ -1,20 +1,95 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Driver async tương ứng với driver sync trong DATABASE_URL
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"Không hỗ trợ async cho database: {backend}")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+
+def _pool_options(url: str, poolclass) -> dict:
+    parsed = make_url(url)
+    # SQLite in-memory dùng SingletonThreadPool, không áp dụng pool size
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _apply_statement_timeout(sync_engine) -> None:
+    """Giới hạn thời gian chạy mỗi câu lệnh ở phía DB (ms), đặt 1 lần cho mỗi kết nối mới"""
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    backend = sync_engine.dialect.name
+    if not timeout_ms or backend not in ("mysql", "postgresql"):
+        return
 
-engine = create_engine(DATABASE_URL)
+    sql = (
+        f"SET SESSION max_execution_time = {int(timeout_ms)}" if backend == "mysql"
+        else f"SET statement_timeout = {int(timeout_ms)}"
+    )
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_timeout(dbapi_conn, record):
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+        # Postgres: SET nằm trong transaction ngầm của driver, commit để không bị rollback khi trả pool
+        if backend == "postgresql":
+            dbapi_conn.commit()
+
+
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL, InstrumentedQueuePool))
+_apply_statement_timeout(engine)
+instrument(engine, "primary")
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+)
+_apply_statement_timeout(async_engine.sync_engine)
+instrument(async_engine.sync_engine, "primary_async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 #connect database
 def get_db():
     db = SessionLocal()
@@ -22,3 +97,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dùng cho các route async (đọc nhiều): không chiếm threadpool của Starlette
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,7 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.datastructures import Default
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.openapi.utils import get_openapi
 from starlette.middleware.sessions import SessionMiddleware
@@ -19,15 +22,41 @@ from app.api.address import router as address
 from app.api.notification import router as notifications
 from app.api.payment import router as payment_router
 
-from app.db.base import Base
-from app.db.session import engine
+from app.db.session import SessionLocal
+from app.db.replicas import mark_write
+from app.core.ghn_master_data import master_data
+from app.core.security import shutdown_password_hasher
+from app.core.mail_queue import start_mail_worker, stop_mail_worker
+from app.core.realtime import start_realtime, stop_realtime
+from app.core.http_cache import catalog_http_cache
+from app.core.responses import ORJSONResponse
 from app.core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
 security = HTTPBearer()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nạp sẵn dữ liệu tỉnh/huyện/xã GHN vào bộ nhớ
+    db = SessionLocal()
+    try:
+        master_data.load(db)
+    finally:
+        db.close()
+    start_mail_worker()
+    start_realtime(asyncio.get_running_loop())
+    yield
+    stop_realtime()
+    stop_mail_worker()
+    shutdown_password_hasher()
+
+
 app = FastAPI(
     title="FastAPI E-commerce API",
+    lifespan=lifespan,
+    # Default(...) để route có response_model vẫn được FastAPI serialize thẳng bằng pydantic
+    default_response_class=Default(ORJSONResponse),
     swagger_ui_parameters={"syntaxHighlight.theme": "monokai"},
 )
 
@@ -38,9 +67,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # cursor phân trang GET /notifications/
 )
 
-Base.metadata.create_all(bind=engine) 
+
+@app.middleware("http")
+async def route_reads_after_write(request: Request, call_next):
+    response = await call_next(request)
+    mark_write(request, response)
+    return response
+
+
+app.middleware("http")(catalog_http_cache)
+
 
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(product_router, prefix="/api/v1") 
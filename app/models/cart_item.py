@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -11,3 +11,8 @@ class CartItem(Base):
     quantity = Column(Integer, default=1, nullable=False)
     product = relationship("Product")
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+    # Mỗi sản phẩm 1 dòng/giỏ, cho phép upsert cộng dồn số lượng
+    __table_args__ = (
+        UniqueConstraint("user_id", "product_id", name="uq_cart_items_user_product"),
+    )
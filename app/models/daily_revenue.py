@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, Date, DECIMAL
+from app.db.base_class import Base
+
+class DailyRevenue(Base):
+    """Doanh thu đã thanh toán (PAID) gom theo ngày tạo đơn"""
+    __tablename__ = "daily_revenue"
+
+    day = Column(Date, primary_key=True)
+    amount = Column(DECIMAL(15,2), nullable=False, default=0)
+    paid_orders = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, text
+from sqlalchemy.dialects.mysql import LONGTEXT
+from app.db.base_class import Base
+
+class GhnMasterData(Base):
+    """Bản sao danh sách tỉnh/huyện/xã của GHN (payload JSON nguyên bản)"""
+    __tablename__ = "ghn_master_data"
+
+    kind = Column(String(20), primary_key=True) # province / district / ward
+    parent_id = Column(Integer, primary_key=True, default=0) # province_id hoặc district_id, 0 với tỉnh
+    payload = Column(Text().with_variant(LONGTEXT, "mysql"), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, ForeignKey, text
+from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, ForeignKey, text, Index
 from app.db.base_class import Base
 
 class Notification(Base):
@@ -11,3 +11,16 @@ class Notification(Base):
     type = Column(String(20))
     is_read = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
+    # Lấy created_at ngay khi flush để đẩy realtime không cần SELECT lại
+    __mapper_args__ = {"eager_defaults": True}
+
+class NotificationCounter(Base):
+    """Số thông báo chưa đọc của mỗi user (đếm sẵn để vẽ badge), chưa có dòng = 0"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
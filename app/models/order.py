@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DECIMAL, TIMESTAMP, ForeignKey,text,Enum, Numeric
+from sqlalchemy import Column, String, Integer, DECIMAL, TIMESTAMP, ForeignKey,text,Enum, Numeric, Index
 from app.db.base_class import Base
 from sqlalchemy.orm import relationship
 import enum
@@ -35,3 +35,8 @@ class Order(Base):
     user = relationship("User", backref="orders")
     address_detail = relationship("Address")
 
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"), # lịch sử đơn của user
+        Index("ix_orders_payment_status_created_at", "payment_status", "created_at"), # dashboard doanh thu
+    )
+
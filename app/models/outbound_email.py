@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, text
+from app.db.base_class import Base
+
+class OutboundEmail(Base):
+    """Hàng đợi email gửi đi, lưu DB để restart không mất thư"""
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    to_address = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html_body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="PENDING", index=True) # PENDING / SENT / FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+    last_error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+    sent_at = Column(TIMESTAMP, nullable=True)
@@ -8,18 +8,18 @@ class Product(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    price = Column(DECIMAL(15,2), nullable=False)
+    price = Column(DECIMAL(15,2), nullable=False, index=True)
     original_price = Column(DECIMAL(15,2))
     discount_percent = Column(Integer, default=0)
-    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"))
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), index=True)
     brand_id = Column(Integer, ForeignKey("brands.id", ondelete="SET NULL"))
     rating_avg = Column(DECIMAL(2,1), default=0)
     reviews_count = Column(Integer, default=0)
-    sold_count = Column(Integer, default=0)
+    sold_count = Column(Integer, default=0, index=True)
     stock = Column(Integer, default=0)
     main_image = Column(Text)
     is_new = Column(Boolean, default=False)
     category = relationship("Category", back_populates="products")
     images = relationship("ProductImage", backref="product", cascade="all, delete-orphan")
     variants = relationship("ProductVariant", backref="product", cascade="all, delete-orphan")
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, TIMESTAMP, ForeignKey, text
+from app.db.base_class import Base
+
+class RelatedProduct(Base):
+    """Danh sách sản phẩm liên quan đã xếp hạng sẵn cho trang chi tiết (rank 0 = phù hợp nhất)"""
+    __tablename__ = "product_related"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True, autoincrement=False)
+    # NULL: dòng đánh dấu "đã tính nhưng không có sản phẩm liên quan" (để TTL vẫn áp dụng)
+    related_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=True, index=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
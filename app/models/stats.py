@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Date, DECIMAL
+from app.db.base_class import Base
+
+class StatCounter(Base):
+    """Giá trị tích lũy hiện tại của 1 chỉ số (orders, revenue, users, products)"""
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(DECIMAL(18,2), nullable=False, default=0)
+
+class DailyStat(Base):
+    """Biến động của 1 chỉ số trong 1 ngày, dùng để tính trend theo kỳ"""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(50), primary_key=True)
+    delta = Column(DECIMAL(18,2), nullable=False, default=0)
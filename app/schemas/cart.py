@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class CartLineIn(BaseModel):
+    product_id: int
+    quantity: int = Field(..., ge=0) # 0 = xóa khỏi giỏ
+
+class CartQuantityUpdate(BaseModel):
+    quantity: int = Field(..., ge=0)
+
+class CartBulkUpdate(BaseModel):
+    items: List[CartLineIn] = Field(..., max_length=200)
+    replace: bool = False # True: giỏ hàng chỉ còn đúng các dòng gửi lên
@@ -16,4 +16,10 @@ class NotificationResponse(NotificationBase):
         from_attributes = True
 
 class NotificationUpdate(BaseModel):
-    is_read: bool
\ No newline at end of file
+    is_read: bool
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
@@ -40,6 +40,7 @@ class PaginatedProductResponse(BaseModel):
     page: int
     size: int
     pages: int
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True